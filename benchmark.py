@@ -0,0 +1,95 @@
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from itertools import islice
+
+from engine import HanoiEngine
+from solver import build_blocks, solution_length
+from solvers import SOLVERS
+
+# Сравнение решателей из solvers.py: скорость (ходов в секунду), пиковая
+# память (tracemalloc) и время до первого хода для N от 3 до 30. Для
+# больших N проходится только первые MAX_MOVES ходов. Перед замерами ходы
+# каждого решателя проигрываются на HanoiEngine: решение должно быть
+# допустимым, собирать башню и иметь длину 2^N - 1. Эталоном не служит
+# ни один из решателей, поэтому сломанный быстрый путь называется по имени.
+
+MIN_DISKS = 3
+MAX_DISKS = 30
+MAX_MOVES = 1 << 20
+CHECK_DISKS = 12
+MEMORY_MOVES = 1 << 14
+
+Measurement = namedtuple('Measurement', ['solver', 'num_disks', 'moves', 'moves_per_second', 'peak_memory', 'first_move'])
+
+
+def solves_tower(moves, num_disks, source, target):
+    engine = HanoiEngine(num_disks, 3, source, target)
+    count = 0
+    for from_peg, to_peg in moves(num_disks, source, target):
+        if not engine.move(from_peg, to_peg):
+            return False
+        count += 1
+    return engine.check_win() and count == solution_length(num_disks)
+
+
+def check_solvers(max_disks=CHECK_DISKS):
+    # Имена решателей, которые не собирают башню оптимальным решением.
+    broken = []
+    for name, moves in SOLVERS.items():
+        for num_disks in range(max_disks + 1):
+            if not all(solves_tower(moves, num_disks, source, target)
+                       for source, target in ((0, 2), (2, 1), (1, 0))):
+                broken.append(name)
+                break
+    return broken
+
+
+def measure(name, num_disks, max_moves=MAX_MOVES):
+    moves = SOLVERS[name]
+    count = min(solution_length(num_disks), max_moves)
+
+    started = time.perf_counter()
+    generator = moves(num_disks)
+    next(generator)
+    first_move = time.perf_counter() - started
+    for _ in islice(generator, count - 1):
+        pass
+    elapsed = time.perf_counter() - started
+
+    # Таблицы блоков быстрого пути кэшируются между вызовами; без сброса
+    # замер памяти их бы не увидел.
+    build_blocks.cache_clear()
+    tracemalloc.start()
+    for _ in islice(moves(num_disks), min(count, MEMORY_MOVES)):
+        pass
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return Measurement(name, num_disks, count, count / elapsed, peak_memory, first_move)
+
+
+def run(solvers=None, min_disks=MIN_DISKS, max_disks=MAX_DISKS, max_moves=MAX_MOVES):
+    return [
+        measure(name, num_disks, max_moves)
+        for num_disks in range(min_disks, max_disks + 1)
+        for name in solvers or SOLVERS
+    ]
+
+
+def main(argv):
+    max_disks = int(argv[1]) if len(argv) > 1 else MAX_DISKS
+    broken = check_solvers()
+    if broken:
+        print("Решатели не собирают башню оптимально:", ", ".join(broken))
+        return 1
+    print(f"{'Решатель':<10} {'N':>3} {'Ходов':>9} {'Ходов/с':>12} {'Память, КБ':>11} {'Первый ход, мкс':>16}")
+    for result in run(max_disks=max_disks):
+        print(f"{result.solver:<10} {result.num_disks:>3} {result.moves:>9} {result.moves_per_second:>12,.0f} "
+              f"{result.peak_memory / 1024:>11.1f} {result.first_move * 1e6:>16.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
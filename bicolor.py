@@ -0,0 +1,195 @@
+from engine import TowerEngine
+from history import MoveLog
+from solver import solution_moves
+
+# Двухцветная двойная башня: для каждого размера есть белый и чёрный диск,
+# диски одного размера можно класть друг на друга. В начале на стержне
+# source лежат пары, в каждой чёрный диск поверх белого. Цель - собрать
+# башню на target: с тем же порядком цветов в парах (GOAL_PRESERVE) или с
+# обратным во всех парах (GOAL_SWAP).
+#
+# Стержень хранится тремя масками по размерам: белые диски, чёрные и
+# black_on_top - бит размера, у которого на стержне оба диска и чёрный
+# сверху. Диск с номером 2 * (size - 1) + color + 1 нужен отрисовке и
+# истории ходов. В позициях (список стержней по номерам дисков) порядок
+# пары не виден: в начальной позиции чёрный диск пары лежит сверху, а в
+# целевой порядок задаёт goal.
+#
+# Перенос башни парами (A) - обычное решение для n дисков, где каждый ход
+# повторён дважды. Он переворачивает только самую большую пару:
+#   B(n) = A(n - 1), пара n: s -> r, A(n - 1) назад, пара n: r -> t, B(n - 1)
+#   S(n) = A(n - 1) на r, пара n: s -> t, Y(n - 1) с r на t
+#   Y(n) = как B(n), но в конце S(n - 1): самая большая пара сохраняет
+#          порядок, остальные переворачиваются
+# Длины: B(n) = 2^(n + 2) - 5, S(n) = (2^(n + 4) - 21 - (-1)^n) / 6; для
+# n <= 6 они совпадают с BFS по всем позициям.
+
+WHITE = 0
+BLACK = 1
+GOAL_PRESERVE = 'preserve'
+GOAL_SWAP = 'swap'
+
+PAIRS = 'A'
+PRESERVE = 'B'
+SWAP = 'S'
+SWAP_SMALLER = 'Y'
+
+
+def bicolor_solution_length(num_disks, goal=GOAL_SWAP):
+    if num_disks <= 0:
+        return 0
+    if goal == GOAL_PRESERVE:
+        return (1 << num_disks + 2) - 5
+    return ((1 << num_disks + 4) - 21 - (-1) ** num_disks) // 6
+
+
+def bicolor_moves(num_disks, source=0, target=2, goal=GOAL_SWAP):
+    if goal not in (GOAL_PRESERVE, GOAL_SWAP):
+        raise ValueError(f"Неизвестная цель: {goal}")
+    if num_disks <= 0 or source == target:
+        return
+    tasks = [(PRESERVE if goal == GOAL_PRESERVE else SWAP, num_disks, source, target)]
+    while tasks:
+        kind, disks, from_peg, to_peg = tasks.pop()
+        if not disks:
+            continue
+        spare = 3 - from_peg - to_peg
+        if kind == PAIRS:
+            for move in solution_moves(disks, from_peg, to_peg):
+                yield move
+                yield move
+        elif kind == SWAP:
+            tasks.append((SWAP_SMALLER, disks - 1, spare, to_peg))
+            tasks.append((PAIRS, 1, from_peg, to_peg))
+            tasks.append((PAIRS, disks - 1, from_peg, spare))
+        elif disks == 1:
+            yield from_peg, spare
+            yield from_peg, to_peg
+            yield spare, to_peg
+        else:
+            # Задачи кладутся в стек в обратном порядке.
+            tasks.append((PRESERVE if kind == PRESERVE else SWAP, disks - 1, from_peg, to_peg))
+            tasks.append((PAIRS, 1, spare, to_peg))
+            tasks.append((PAIRS, disks - 1, to_peg, from_peg))
+            tasks.append((PAIRS, 1, from_peg, spare))
+            tasks.append((PAIRS, disks - 1, from_peg, to_peg))
+
+
+class BicolorEngine(TowerEngine):
+    num_pegs = 3
+    board_lists = ('whites', 'blacks', 'black_on_top')
+
+    def __init__(self, num_disks=3, source=0, target=2, goal=GOAL_SWAP):
+        if goal not in (GOAL_PRESERVE, GOAL_SWAP):
+            raise ValueError(f"Неизвестная цель: {goal}")
+        self.num_disks = num_disks
+        self.source = source
+        self.target = target
+        self.goal = goal
+        self.bus = None
+        self.new_game()
+
+    def new_game(self, start=None, target=None):
+        if start is None:
+            start = [self.source] * self.disk_count()
+        if target is None:
+            target = [self.target] * self.disk_count()
+        self.check_positions(start)
+        self.check_positions(target)
+        self.target_positions = list(target)
+        self.whites, self.blacks, self.black_on_top = self.positions_to_masks(start, BLACK)
+        target_top = BLACK if self.goal == GOAL_PRESERVE else WHITE
+        self.target_state = tuple(zip(*self.positions_to_masks(target, target_top)))
+        self.move_count = 0
+        self.history = MoveLog()
+        self.rebuild_legal_moves()
+
+    def positions_to_masks(self, positions, top_color):
+        # Пара на одном стержне лежит цветом top_color вверх.
+        whites = [0] * 3
+        blacks = [0] * 3
+        for index, peg in enumerate(positions):
+            masks = blacks if self.disk_color(index + 1) == BLACK else whites
+            masks[peg] |= 1 << (self.disk_size(index + 1) - 1)
+        if top_color == BLACK:
+            black_on_top = [white & black for white, black in zip(whites, blacks)]
+        else:
+            black_on_top = [0] * 3
+        return whites, blacks, black_on_top
+
+    def positions(self):
+        positions = [0] * self.disk_count()
+        for peg in range(3):
+            for disk in self.peg_disks(peg):
+                positions[disk - 1] = peg
+        return positions
+
+    def disk_count(self):
+        return 2 * self.num_disks
+
+    def disk_size(self, disk):
+        return (disk + 1) // 2
+
+    def disk_color(self, disk):
+        return (disk - 1) % 2
+
+    def state(self):
+        return tuple(zip(self.whites, self.blacks, self.black_on_top))
+
+    def top(self, peg):
+        # (бит размера, цвет) верхнего диска или (0, None) для пустого стержня.
+        both = self.whites[peg] | self.blacks[peg]
+        if not both:
+            return 0, None
+        bit = both & -both
+        if self.whites[peg] & self.blacks[peg] & bit:
+            return bit, BLACK if self.black_on_top[peg] & bit else WHITE
+        return bit, WHITE if self.whites[peg] & bit else BLACK
+
+    def top_disk(self, peg):
+        bit, color = self.top(peg)
+        if not bit:
+            return 0
+        return 2 * (bit.bit_length() - 1) + color + 1
+
+    def peg_disks(self, peg):
+        disks = []
+        whites = self.whites[peg]
+        blacks = self.blacks[peg]
+        for size in range(self.num_disks, 0, -1):
+            bit = 1 << (size - 1)
+            colors = [color for color, mask in ((WHITE, whites), (BLACK, blacks)) if mask & bit]
+            if len(colors) == 2 and not self.black_on_top[peg] & bit:
+                colors.reverse()
+            disks.extend(2 * (size - 1) + color + 1 for color in colors)
+        return disks
+
+    def peg_lists(self):
+        return [self.peg_disks(peg) for peg in range(3)]
+
+    def rebuild_legal_moves(self):
+        # В отличие от обычной башни диск можно положить на диск того же размера.
+        empty_top = 1 << self.num_disks
+        tops = [self.top(peg)[0] or empty_top for peg in range(3)]
+        self.legal_moves = {
+            (from_peg, to_peg)
+            for from_peg in range(3)
+            for to_peg in range(3)
+            if from_peg != to_peg and tops[from_peg] != empty_top and tops[from_peg] <= tops[to_peg]
+        }
+
+    def is_valid_move(self, from_peg, to_peg):
+        return (from_peg, to_peg) in self.legal_moves
+
+    def shift_disk(self, from_peg, to_peg):
+        bit, color = self.top(from_peg)
+        masks = self.blacks if color == BLACK else self.whites
+        masks[from_peg] ^= bit
+        self.black_on_top[from_peg] &= ~bit
+        if (self.whites[to_peg] | self.blacks[to_peg]) & bit and color == BLACK:
+            self.black_on_top[to_peg] |= bit
+        masks[to_peg] |= bit
+        self.rebuild_legal_moves()
+
+    def check_win(self):
+        return self.state() == self.target_state
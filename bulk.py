@@ -0,0 +1,127 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Пакетная проверка последовательности ходов.
+#
+# Ходы разбираются по дискам, начиная с самого маленького. Пока все
+# предыдущие ходы допустимы, ход (s, t) для диска d означает одно из трёх:
+# диск d лежит на s - значит ход перекладывает именно его; диск d лежит на
+# t - ход недопустим (больший диск кладётся на меньший); иначе ход касается
+# только больших дисков и передаётся на следующий уровень. Позиция диска
+# по ходу последовательности - это префиксная композиция отображений
+# "s -> t, остальные стержни на месте", которая считается блоками
+# векторно за O(M) на уровень.
+
+BLOCK_SIZE = 64
+MAX_TABLE_PEGS = 4
+
+
+@lru_cache(maxsize=None)
+def map_tables(num_pegs):
+    # Отображение f стержней в стержни кодируется числом sum f(x) * k^x.
+    # compose[a * num_maps + b] - код композиции a(b(x)),
+    # apply[code * num_pegs + x] - значение отображения в точке x,
+    # move_codes[s * num_pegs + t] - код отображения для хода s -> t.
+    num_maps = num_pegs ** num_pegs
+    powers = num_pegs ** np.arange(num_pegs)
+    values = np.array(
+        [[code // num_pegs ** x % num_pegs for x in range(num_pegs)] for code in range(num_maps)],
+        dtype=np.int64,
+    )
+    composed = np.take_along_axis(
+        np.broadcast_to(values[:, np.newaxis, :], (num_maps, num_maps, num_pegs)),
+        np.broadcast_to(values[np.newaxis, :, :], (num_maps, num_maps, num_pegs)),
+        axis=2,
+    )
+    compose = (composed * powers).sum(axis=2).astype(np.uint8).ravel()
+    identity = int((np.arange(num_pegs) * powers).sum())
+    move_codes = np.full(num_pegs * num_pegs, identity, dtype=np.uint8)
+    for source in range(num_pegs):
+        for target in range(num_pegs):
+            move_codes[source * num_pegs + target] = identity + (target - source) * num_pegs ** source
+    return compose, values.astype(np.uint8).ravel(), identity, move_codes
+
+
+def scan_positions(codes, start, num_pegs):
+    # Позиции диска после каждого отображения из codes. Внутри блоков
+    # префиксы считаются построчно (строка - очередной ход всех блоков),
+    # начальные позиции блоков - рекурсивно по итоговым отображениям.
+    compose, apply, identity, _ = map_tables(num_pegs)
+    num_maps = num_pegs ** num_pegs
+    length = len(codes)
+    num_blocks = -(-length // BLOCK_SIZE)
+    padded = np.full(num_blocks * BLOCK_SIZE, identity, dtype=np.uint8)
+    padded[:length] = codes
+    blocks = np.ascontiguousarray(padded.reshape(num_blocks, BLOCK_SIZE).T)
+    for row in range(1, BLOCK_SIZE):
+        index = blocks[row].astype(np.uint16)
+        index *= num_maps
+        index += blocks[row - 1]
+        blocks[row] = compose.take(index)
+    block_starts = np.empty(num_blocks, dtype=np.uint8)
+    block_starts[0] = start
+    if num_blocks > 1:
+        block_starts[1:] = scan_positions(blocks[-1], start, num_pegs)[:-1]
+    index = blocks.astype(np.uint16)
+    index *= num_pegs
+    index += block_starts
+    return apply.take(index).T.ravel()[:length]
+
+
+def disk_positions(sources, targets, start, num_pegs):
+    move_codes = map_tables(num_pegs)[3]
+    index = sources.astype(np.uint16)
+    index *= num_pegs
+    index += targets
+    after = scan_positions(move_codes.take(index), start, num_pegs)
+    before = np.empty_like(after)
+    before[0] = start
+    before[1:] = after[:-1]
+    return before
+
+
+def validate_moves(positions, moves, num_pegs=3):
+    # Возвращает (индекс первого недопустимого хода или None, позиции
+    # дисков после всех ходов до него).
+    if num_pegs > MAX_TABLE_PEGS:
+        raise ValueError(f"Пакетная проверка поддерживает не больше {MAX_TABLE_PEGS} стержней")
+    moves = np.asarray(moves).reshape(-1, 2)
+    sources = moves[:, 0]
+    targets = moves[:, 1]
+    broken = (sources >= num_pegs) | (targets >= num_pegs) | (sources == targets)
+    if np.issubdtype(moves.dtype, np.signedinteger):
+        broken |= (sources < 0) | (targets < 0)
+    first_bad = int(np.argmax(broken)) if broken.any() else len(moves)
+    final_positions = list(positions)
+
+    remaining = np.arange(first_bad, dtype=np.uint32 if first_bad < 2 ** 32 else np.int64)
+    level_sources = sources[:first_bad].astype(np.uint8)
+    level_targets = targets[:first_bad].astype(np.uint8)
+    for disk, start in enumerate(positions):
+        if not len(remaining):
+            break
+        before = disk_positions(level_sources, level_targets, start, num_pegs)
+        blocked = before == level_targets
+        if blocked.any():
+            cut = int(np.argmax(blocked))
+            first_bad = int(remaining[cut])
+            remaining = remaining[:cut]
+            level_sources = level_sources[:cut]
+            level_targets = level_targets[:cut]
+            before = before[:cut]
+        moving = before == level_sources
+        if moving.any():
+            last_move = len(moving) - 1 - int(np.argmax(moving[::-1]))
+            final_positions[disk] = int(level_targets[last_move])
+        staying = ~moving
+        remaining = remaining[staying]
+        level_sources = level_sources[staying]
+        level_targets = level_targets[staying]
+
+    if len(remaining):
+        first_bad = int(remaining[0])
+    if first_bad == len(moves):
+        return None, final_positions
+    _, final_positions = validate_moves(positions, moves[:first_bad], num_pegs)
+    return first_bad, final_positions
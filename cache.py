@@ -0,0 +1,128 @@
+import os
+import sys
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+# Постоянный кэш таблиц решателей в каталоге данных пользователя. Запись
+# хранится отдельным .npy-файлом, имя которого составлено из варианта
+# головоломки, числа дисков и (если нужно) ID позиции.
+#
+# Чтение идёт без блокировок: файл открывается через
+# np.load(mmap_mode='r'). Запись атомарна: данные пишутся во временный
+# файл в том же каталоге, который затем подменяет старый через
+# os.replace. Время изменения файла служит отметкой последнего
+# обращения. Когда размер кэша превышает бюджет, удаляются давно не
+# использованные записи. Размер кэша считается сканированием каталога
+# один раз, дальше обновляется при каждой записи; каталог просматривается
+# снова, только когда эта оценка выходит за бюджет.
+
+CACHE_BUDGET = 512 << 20
+APP_NAME = 'hanoi-towers'
+
+
+def data_directory():
+    override = os.environ.get('HANOI_CACHE_DIR')
+    if override:
+        return override
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(base, APP_NAME, 'cache')
+
+
+class SolverCache:
+    def __init__(self, directory=None, budget=CACHE_BUDGET):
+        self.directory = directory or data_directory()
+        self.budget = budget
+        self.total = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, variant, num_disks, state_id=None):
+        name = f"{variant}-{num_disks}" if state_id is None else f"{variant}-{num_disks}-{state_id}"
+        return os.path.join(self.directory, name + '.npy')
+
+    def load(self, variant, num_disks, state_id=None):
+        path = self.path(variant, num_disks, state_id)
+        try:
+            os.utime(path)
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            # Записи нет, её только что вытеснили или файл повреждён.
+            return None
+
+    def store(self, variant, num_disks, array, state_id=None):
+        path = self.path(variant, num_disks, state_id)
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                np.save(output, np.asarray(array))
+                written = output.tell()
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        if self.total is None:
+            self.total = self.size()
+        else:
+            self.total += written - replaced
+        if self.total > self.budget:
+            self.evict()
+        return path
+
+    def get_or_build(self, variant, num_disks, build, state_id=None):
+        array = self.load(variant, num_disks, state_id)
+        if array is None:
+            array = build()
+            self.store(variant, num_disks, array, state_id)
+        return array
+
+    def entries(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.npy'):
+                continue
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+            found.append((info.st_mtime, info.st_size, entry.path))
+        return found
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Файл уже удалён другим процессом или открыт (Windows).
+                continue
+            total -= size
+        self.total = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.total = None
+
+
+@lru_cache(maxsize=None)
+def default_cache():
+    return SolverCache()
@@ -0,0 +1,62 @@
+import time
+
+
+class WallClock:
+    def now(self):
+        return time.time()
+
+
+class MonotonicClock:
+    def now(self):
+        return time.monotonic()
+
+
+class VirtualClock:
+    # Время идёт только при вызове advance(), поэтому таймер, рекорды и
+    # повторы можно прогонять детерминированно и с любым ускорением.
+
+    def __init__(self, start=0.0):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += seconds
+
+
+class ScaledClock:
+    def __init__(self, base, speed):
+        self.base = base
+        self.speed = speed
+        self.origin = base.now()
+
+    def now(self):
+        return self.origin + (self.base.now() - self.origin) * self.speed
+
+
+class GameTimer:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.reset()
+
+    def reset(self):
+        self.accumulated = 0.0
+        self.started_at = None
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = self.clock.now()
+
+    def stop(self):
+        if self.started_at is not None:
+            self.accumulated += self.clock.now() - self.started_at
+            self.started_at = None
+
+    def is_running(self):
+        return self.started_at is not None
+
+    def elapsed(self):
+        if self.started_at is None:
+            return self.accumulated
+        return self.accumulated + self.clock.now() - self.started_at
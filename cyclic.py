@@ -0,0 +1,81 @@
+from functools import lru_cache
+
+from engine import RestrictedHanoiEngine
+
+# Циклический вариант: диск можно переложить только на следующий стержень
+# по часовой стрелке (0 -> 1 -> 2 -> 0).
+#
+# Оптимальное решение (Аткинсон) строится двумя взаимно рекурсивными
+# процедурами: Q(n, s) переносит башню на один шаг (s -> s + 1), R(n, s) -
+# на два шага (s -> s + 2):
+#   Q(n, s) = R(n - 1, s), диск n: s -> s + 1, R(n - 1, s + 2)
+#   R(n, s) = R(n - 1, s), диск n: s -> s + 1, Q(n - 1, s + 2),
+#             диск n: s + 1 -> s + 2, R(n - 1, s)
+# Длины растут как (1 + sqrt(3))^n, поэтому генератор разворачивает
+# рекурсию стеком задач, а решения для башен до CYCLIC_BLOCK_DISKS дисков
+# строит один раз и отдаёт готовыми кортежами.
+
+CLOCKWISE_MOVES = frozenset({(0, 1), (1, 2), (2, 0)})
+CYCLIC_BLOCK_DISKS = 8
+ONE_STEP = 'Q'
+TWO_STEPS = 'R'
+
+
+class CyclicHanoiEngine(RestrictedHanoiEngine):
+    allowed = CLOCKWISE_MOVES
+
+    def __init__(self, num_disks=3, source=0, target=2):
+        super().__init__(num_disks, 3, source, target)
+
+
+def cyclic_lengths(num_disks):
+    # Число ходов (Q, R) для башни из num_disks дисков.
+    one_step, two_steps = 0, 0
+    for _ in range(num_disks):
+        one_step, two_steps = 2 * two_steps + 1, 2 * two_steps + one_step + 2
+    return one_step, two_steps
+
+
+def cyclic_solution_length(num_disks, source=0, target=2):
+    steps = (target - source) % 3
+    if not steps:
+        return 0
+    return cyclic_lengths(num_disks)[steps - 1]
+
+
+@lru_cache(maxsize=None)
+def cyclic_block(kind, num_disks, source):
+    return tuple(cyclic_tasks(kind, num_disks, source, 0))
+
+
+def cyclic_tasks(kind, num_disks, source, block_disks):
+    tasks = [(kind, num_disks, source)]
+    while tasks:
+        kind, disks, peg = tasks.pop()
+        if kind is None:
+            yield peg, (peg + 1) % 3
+            continue
+        if not disks:
+            continue
+        if disks <= block_disks:
+            yield from cyclic_block(kind, disks, peg)
+            continue
+        # Задачи кладутся в стек в обратном порядке; (None, 0, s) - ход s -> s + 1.
+        if kind == ONE_STEP:
+            tasks.append((TWO_STEPS, disks - 1, (peg + 2) % 3))
+            tasks.append((None, 0, peg))
+            tasks.append((TWO_STEPS, disks - 1, peg))
+        else:
+            tasks.append((TWO_STEPS, disks - 1, peg))
+            tasks.append((None, 0, (peg + 1) % 3))
+            tasks.append((ONE_STEP, disks - 1, (peg + 2) % 3))
+            tasks.append((None, 0, peg))
+            tasks.append((TWO_STEPS, disks - 1, peg))
+
+
+def cyclic_moves(num_disks, source=0, target=2):
+    steps = (target - source) % 3
+    if num_disks <= 0 or not steps:
+        return
+    kind = ONE_STEP if steps == 1 else TWO_STEPS
+    yield from cyclic_tasks(kind, num_disks, source, CYCLIC_BLOCK_DISKS)
@@ -0,0 +1,96 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Позиция кодируется числом в системе счисления по основанию num_pegs:
+# цифра i - номер стержня, на котором лежит диск i + 1.
+
+MAX_VECTOR_DISKS = {2: 64, 3: 40, 4: 32}
+SPREAD_CHUNK_BITS = 8
+
+
+def encode_state(positions, num_pegs=3):
+    state_id = 0
+    for peg in reversed(positions):
+        state_id = state_id * num_pegs + int(peg)
+    return state_id
+
+
+def decode_state(state_id, num_disks, num_pegs=3):
+    positions = []
+    for _ in range(num_disks):
+        state_id, peg = divmod(state_id, num_pegs)
+        positions.append(peg)
+    return positions
+
+
+def masks_to_state(pegs):
+    num_pegs = len(pegs)
+    state_id = 0
+    for peg in range(1, num_pegs):
+        if pegs[peg]:
+            state_id += peg * spread_bits(pegs[peg], pegs[peg].bit_length(), num_pegs)
+    return state_id
+
+
+def spread_bits(mask, width, base):
+    # Двоичные цифры mask, прочитанные как цифры по основанию base. Маска
+    # делится пополам до байтов, значения байтов берутся из таблицы:
+    # побитовый цикл был бы квадратичным, а int(str, base) не работает
+    # для чисел длиннее 4300 цифр.
+    if width <= SPREAD_CHUNK_BITS:
+        return byte_values(base)[mask]
+    half = width // 2
+    low = mask & ((1 << half) - 1)
+    return spread_bits(mask >> half, width - half, base) * base_power(base, half) + spread_bits(low, half, base)
+
+
+@lru_cache(maxsize=None)
+def byte_values(base):
+    values = [0] * (1 << SPREAD_CHUNK_BITS)
+    for mask in range(1, len(values)):
+        values[mask] = values[mask >> 1] * base + (mask & 1)
+    return values
+
+
+@lru_cache(maxsize=None)
+def base_power(base, exponent):
+    return base ** exponent
+
+
+def state_to_masks(state_id, num_disks, num_pegs=3):
+    pegs = [0] * num_pegs
+    for disk in range(num_disks):
+        state_id, peg = divmod(state_id, num_pegs)
+        pegs[peg] |= 1 << disk
+    return pegs
+
+
+def check_vector_size(num_disks, num_pegs):
+    limit = MAX_VECTOR_DISKS.get(num_pegs, int(64 // np.log2(num_pegs)))
+    if num_disks > limit:
+        raise ValueError(f"{num_disks} дисков на {num_pegs} стержнях не помещаются в uint64")
+
+
+def encode_states(positions, num_pegs=3):
+    positions = np.asarray(positions)
+    if positions.ndim == 1:
+        positions = positions[np.newaxis, :]
+    num_disks = positions.shape[1]
+    check_vector_size(num_disks, num_pegs)
+    state_ids = np.zeros(positions.shape[0], dtype=np.uint64)
+    base = np.uint64(num_pegs)
+    for disk in range(num_disks - 1, -1, -1):
+        state_ids *= base
+        state_ids += positions[:, disk].astype(np.uint64)
+    return state_ids
+
+
+def decode_states(state_ids, num_disks, num_pegs=3):
+    check_vector_size(num_disks, num_pegs)
+    state_ids = np.array(state_ids, dtype=np.uint64, ndmin=1)
+    positions = np.empty((state_ids.shape[0], num_disks), dtype=np.uint8)
+    base = np.uint64(num_pegs)
+    for disk in range(num_disks):
+        state_ids, positions[:, disk] = np.divmod(state_ids, base)
+    return positions
@@ -0,0 +1,317 @@
+import numpy as np
+
+from bulk import validate_moves
+from encoding import decode_state, encode_state, masks_to_state, state_to_masks
+from events import GameWon, MoveApplied
+from history import MoveLog
+
+
+def build_three_peg_moves():
+    # Для трёх стержней после хода from -> to множество допустимых ходов
+    # определяется двумя сравнениями с вершиной третьего стержня:
+    # переложенный диск меньше неё или больше, а открывшаяся вершина
+    # стержня from меньше, равна (оба пусты) или больше неё.
+    table = {}
+    for from_peg in range(3):
+        for to_peg in range(3):
+            if from_peg == to_peg:
+                continue
+            other = 3 - from_peg - to_peg
+            cases = []
+            for moved_is_smaller in (False, True):
+                for uncovered_order in (-1, 0, 1):
+                    moves = {(to_peg, from_peg)}
+                    if moved_is_smaller:
+                        moves.add((to_peg, other))
+                    else:
+                        moves.add((other, to_peg))
+                    if uncovered_order < 0:
+                        moves.add((from_peg, other))
+                    elif uncovered_order > 0:
+                        moves.add((other, from_peg))
+                    cases.append(frozenset(moves))
+            table[from_peg, to_peg] = tuple(cases)
+    return table
+
+
+THREE_PEG_MOVES = build_three_peg_moves()
+
+
+class TowerEngine:
+    # Общая часть движков: ход, отмена и повтор через MoveLog, события на
+    # шине, ветки и проверка позиций. Подкласс задаёт disk_count,
+    # is_valid_move, shift_disk, check_win и в board_lists - списки, которые
+    # меняются ходами и копируются в ветку.
+
+    board_lists = ()
+
+    def check_positions(self, positions):
+        if len(positions) != self.disk_count():
+            raise ValueError(f"Ожидалось {self.disk_count()} позиций дисков, получено {len(positions)}")
+        for peg in positions:
+            if not 0 <= peg < self.num_pegs:
+                raise ValueError(f"Стержня {peg} нет на доске из {self.num_pegs} стержней")
+
+    def move(self, from_peg, to_peg):
+        if not self.is_valid_move(from_peg, to_peg):
+            return False
+        self.shift_disk(from_peg, to_peg)
+        self.move_count += 1
+        self.history.append(from_peg, to_peg)
+        if self.bus is not None:
+            self.publish_move(from_peg, to_peg)
+        return True
+
+    def publish_move(self, from_peg, to_peg):
+        self.bus.publish(MoveApplied(from_peg, to_peg, self.move_count))
+        if self.check_win():
+            self.bus.publish(GameWon(self.move_count))
+
+    def undo(self):
+        last_move = self.history.undo()
+        if last_move is None:
+            return None
+        from_peg, to_peg = last_move
+        self.shift_disk(to_peg, from_peg)
+        self.move_count -= 1
+        if self.bus is not None:
+            self.bus.publish(MoveApplied(to_peg, from_peg, self.move_count))
+        return last_move
+
+    def redo(self):
+        next_move = self.history.redo()
+        if next_move is None:
+            return None
+        self.shift_disk(*next_move)
+        self.move_count += 1
+        if self.bus is not None:
+            self.publish_move(*next_move)
+        return next_move
+
+    def fork(self):
+        # Маски стержней - неизменяемые int, поэтому ветке достаточно
+        # скопировать списки из board_lists; история разделяется
+        # с родителем через MoveLog.fork().
+        branch = object.__new__(type(self))
+        branch.__dict__.update(self.__dict__)
+        for name in self.board_lists:
+            setattr(branch, name, list(getattr(self, name)))
+        if isinstance(self.legal_moves, set):
+            branch.legal_moves = set(self.legal_moves)
+        branch.history = self.history.fork()
+        branch.bus = None
+        return branch
+
+
+class HanoiEngine(TowerEngine):
+    # Каждый стержень хранится как битовая маска: бит (d - 1) означает,
+    # что на стержне лежит диск размера d. Верхний диск стержня - это
+    # младший установленный бит, поэтому все проверки делаются за O(1).
+    # tops хранит младший бит каждого стержня (для пустого - бит за
+    # пределами доски), так что ход from -> to допустим, если
+    # tops[from] < tops[to]. Множество legal_moves обновляется после
+    # каждого хода только для пар, затронутых этим ходом.
+    # mismatches - число дисков не на своём месте в целевой позиции;
+    # ход меняет его не больше чем на единицу, поэтому победа
+    # проверяется за O(1).
+
+    board_lists = ('pegs', 'tops')
+
+    def __init__(self, num_disks=3, num_pegs=3, source=0, target=2):
+        self.num_disks = num_disks
+        self.num_pegs = num_pegs
+        self.source = source
+        self.target = target
+        self.bus = None
+        self.new_game()
+
+    def new_game(self, start=None, target=None):
+        self.full_mask = (1 << self.num_disks) - 1
+        if start is None:
+            start = [self.source] * self.num_disks
+        if target is None:
+            target = [self.target] * self.num_disks
+        self.check_positions(start)
+        self.check_positions(target)
+        self.target_positions = list(target)
+        self.pegs = state_to_masks(encode_state(start, self.num_pegs), self.num_disks, self.num_pegs)
+        self.move_count = 0
+        self.history = MoveLog()
+        self.rebuild_legal_moves()
+        self.count_mismatches()
+
+    def count_mismatches(self):
+        target = self.target_positions
+        self.mismatches = sum(
+            1 for disk, peg in enumerate(self.positions()) if peg != target[disk]
+        )
+
+    def rebuild_legal_moves(self):
+        empty_top = 1 << self.num_disks
+        self.tops = [(mask & -mask) or empty_top for mask in self.pegs]
+        tops = self.tops
+        self.legal_moves = {
+            (from_peg, to_peg)
+            for from_peg in range(self.num_pegs)
+            for to_peg in range(self.num_pegs)
+            if tops[from_peg] < tops[to_peg]
+        }
+
+    def update_legal_moves(self, from_peg, to_peg):
+        # Переложенный диск меньше всех дисков на обоих затронутых
+        # стержнях, поэтому пара (to, from) всегда становится допустимой,
+        # а остальные пары сравниваются только с изменившимися вершинами.
+        tops = self.tops
+        legal_moves = self.legal_moves
+        moved = tops[to_peg]
+        uncovered = tops[from_peg]
+        legal_moves.add((to_peg, from_peg))
+        legal_moves.discard((from_peg, to_peg))
+        for other in range(self.num_pegs):
+            if other == from_peg or other == to_peg:
+                continue
+            other_top = tops[other]
+            if moved < other_top:
+                legal_moves.add((to_peg, other))
+                legal_moves.discard((other, to_peg))
+            else:
+                legal_moves.add((other, to_peg))
+                legal_moves.discard((to_peg, other))
+            if uncovered < other_top:
+                legal_moves.add((from_peg, other))
+                legal_moves.discard((other, from_peg))
+            elif other_top < uncovered:
+                legal_moves.add((other, from_peg))
+                legal_moves.discard((from_peg, other))
+            else:
+                legal_moves.discard((from_peg, other))
+                legal_moves.discard((other, from_peg))
+
+    def has_legal_moves(self):
+        return bool(self.legal_moves)
+
+    def disk_count(self):
+        return self.num_disks
+
+    def disk_size(self, disk):
+        return disk
+
+    def disk_color(self, disk):
+        # Цвет диска задаёт только двухцветный вариант (bicolor.py).
+        return None
+
+    def top_disk(self, peg):
+        if not self.pegs[peg]:
+            return 0
+        return self.tops[peg].bit_length()
+
+    def peg_disks(self, peg):
+        mask = self.pegs[peg]
+        disks = []
+        while mask:
+            disk = mask.bit_length()
+            disks.append(disk)
+            mask ^= 1 << (disk - 1)
+        return disks
+
+    def peg_lists(self):
+        return [self.peg_disks(peg) for peg in range(self.num_pegs)]
+
+    def positions(self):
+        return decode_state(self.state_id(), self.num_disks, self.num_pegs)
+
+    def state_id(self):
+        return masks_to_state(self.pegs)
+
+    def load_positions(self, positions):
+        self.check_positions(positions)
+        self.load_state_id(encode_state(positions, self.num_pegs))
+
+    def load_state_id(self, state_id):
+        self.pegs = state_to_masks(state_id, self.num_disks, self.num_pegs)
+        self.rebuild_legal_moves()
+        self.count_mismatches()
+
+    def is_valid_move(self, from_peg, to_peg):
+        return self.tops[from_peg] < self.tops[to_peg]
+
+    def apply_moves(self, moves):
+        # Применяет массив ходов формы (M, 2). Все ходы проверяются одним
+        # векторным проходом; если среди них есть недопустимый, применяются
+        # только ходы до него, а его индекс возвращается.
+        moves = np.asarray(moves).reshape(-1, 2)
+        first_bad, positions = validate_moves(self.positions(), moves, self.num_pegs)
+        applied = len(moves) if first_bad is None else first_bad
+        if applied:
+            self.load_positions(positions)
+            codes = moves[:applied, 0].astype(np.uint8) << 4 | moves[:applied, 1].astype(np.uint8)
+            self.history.extend(codes)
+            self.move_count += applied
+            if self.bus is not None:
+                self.publish_move(int(moves[applied - 1, 0]), int(moves[applied - 1, 1]))
+        return first_bad
+
+    def shift_disk(self, from_peg, to_peg):
+        pegs = self.pegs
+        tops = self.tops
+        bit = tops[from_peg]
+        source = pegs[from_peg] ^ bit
+        pegs[from_peg] = source
+        pegs[to_peg] |= bit
+        uncovered = (source & -source) or (1 << self.num_disks)
+        tops[from_peg] = uncovered
+        tops[to_peg] = bit
+        target_peg = self.target_positions[bit.bit_length() - 1]
+        self.mismatches += (target_peg == from_peg) - (target_peg == to_peg)
+        if self.num_pegs == 3:
+            other_top = tops[3 - from_peg - to_peg]
+            case = 3 * (bit < other_top) + 1 + (uncovered > other_top) - (uncovered < other_top)
+            self.legal_moves = THREE_PEG_MOVES[from_peg, to_peg][case]
+        else:
+            self.update_legal_moves(from_peg, to_peg)
+
+    def check_win(self):
+        return not self.mismatches
+
+
+class RestrictedHanoiEngine(HanoiEngine):
+    # Вариант, в котором разрешены не все пары стержней: allowed - множество
+    # допустимых направлений (from, to). Правило о размере дисков
+    # проверяется как обычно, а legal_moves пересекается с allowed после
+    # каждого пересчёта. Отмена хода перекладывает диск в обратную сторону
+    # и правилами не ограничена.
+
+    allowed = frozenset()
+
+    def __init__(self, num_disks=3, num_pegs=3, source=0, target=2):
+        self.allowed_table = np.zeros((num_pegs, num_pegs), dtype=bool)
+        for from_peg, to_peg in self.allowed:
+            self.allowed_table[from_peg, to_peg] = True
+        super().__init__(num_disks, num_pegs, source, target)
+
+    def rebuild_legal_moves(self):
+        super().rebuild_legal_moves()
+        self.legal_moves &= self.allowed
+
+    def is_valid_move(self, from_peg, to_peg):
+        return (from_peg, to_peg) in self.allowed and super().is_valid_move(from_peg, to_peg)
+
+    def shift_disk(self, from_peg, to_peg):
+        super().shift_disk(from_peg, to_peg)
+        self.legal_moves = self.legal_moves & self.allowed
+
+    def apply_moves(self, moves):
+        moves = np.asarray(moves).reshape(-1, 2)
+        # Ходы с несуществующими стержнями пропускаются мимо таблицы: их
+        # индекс вернёт проверка в базовом apply_moves.
+        in_range = ((moves >= 0) & (moves < self.num_pegs)).all(axis=1)
+        checked = np.where(in_range[:, np.newaxis], moves, 0)
+        forbidden = np.flatnonzero(in_range & ~self.allowed_table[checked[:, 0], checked[:, 1]])
+        if not len(forbidden):
+            return super().apply_moves(moves)
+        cut = int(forbidden[0])
+        if cut:
+            first_bad = super().apply_moves(moves[:cut])
+            if first_bad is not None:
+                return first_bad
+        return cut
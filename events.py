@@ -0,0 +1,48 @@
+from collections import namedtuple
+
+MoveApplied = namedtuple('MoveApplied', ['from_peg', 'to_peg', 'move_count'])
+GameWon = namedtuple('GameWon', ['move_count'])
+LevelChanged = namedtuple('LevelChanged', ['level', 'num_disks'])
+
+
+class EventBus:
+    # События копятся в очереди и доставляются вызовом flush(), обычно
+    # раз в кадр. Подписчик с coalesce=True получает за один flush только
+    # последнее событие своего типа, поэтому серия ходов от бота или
+    # повтора вызывает одну перерисовку и одно сохранение, а не N.
+
+    def __init__(self, on_pending=None):
+        self.handlers = {}
+        self.pending = []
+        self.on_pending = on_pending
+
+    def subscribe(self, event_type, handler, coalesce=False):
+        self.handlers.setdefault(event_type, []).append((handler, coalesce))
+
+    def unsubscribe(self, event_type, handler):
+        self.handlers[event_type] = [
+            entry for entry in self.handlers.get(event_type, []) if entry[0] != handler
+        ]
+
+    def publish(self, event):
+        was_idle = not self.pending
+        self.pending.append(event)
+        if was_idle and self.on_pending is not None:
+            self.on_pending()
+
+    def flush(self):
+        events = self.pending
+        if not events:
+            return
+        self.pending = []
+        latest = {}
+        for event in events:
+            latest[type(event)] = event
+        for event in events:
+            for handler, coalesce in self.handlers.get(type(event), ()):
+                if not coalesce:
+                    handler(event)
+        for event_type, event in latest.items():
+            for handler, coalesce in self.handlers.get(event_type, ()):
+                if coalesce:
+                    handler(event)
@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from four_peg_bfs import NUM_PEGS, canonicalize, encode, neighbours
+
+# BFS по каноническим позициям четырёх стержней (см. four_peg_bfs.py) для
+# случаев, когда 4^N позиций не помещаются в память. Каждый слой хранится
+# на диске отсортированным файлом uint64 и читается через np.memmap.
+#
+# Слой d + 1 строится так: фронт d читается кусками, соседи каждого куска
+# сортируются и пишутся отдельным прогоном. Прогоны сливаются потоком,
+# и из результата вычитаются слои d и d - 1. Граф неориентированный,
+# поэтому других уже посещённых соседей у фронта быть не может. Все
+# операции идут блоками фиксированного размера, так что память
+# ограничена бюджетом, а скорость - диском.
+#
+# Одновременно сливается не больше MERGE_FAN_IN прогонов: каждый открыт
+# через memmap и держит дескриптор файла, а окно на прогон - доля блока.
+# Если прогонов больше, они сначала сливаются группами в промежуточные
+# прогоны, пока их не останется MERGE_FAN_IN.
+
+# Оценка памяти на одну позицию фронта и один диск при раскрытии: до 12
+# соседей, для каждого - несколько временных массивов по диску
+# (uint8-позиции, int64-индексы для переименования, uint64 при кодировании).
+BYTES_PER_DISK = 12 * 32
+MIN_CHUNK_STATES = 1 << 10
+MERGE_FAN_IN = 16
+
+
+def open_sorted(path):
+    if not os.path.getsize(path):
+        return np.empty(0, dtype=np.uint64)
+    return np.memmap(path, dtype=np.uint64, mode='r')
+
+
+def merge_runs(paths, block):
+    # Поблочное слияние отсортированных прогонов: из каждого прогона
+    # берётся окно, и выдаётся всё, что не больше наименьшего из последних
+    # элементов окон. Окно с этим элементом расходуется целиком, поэтому
+    # слияние всегда продвигается, а повторов между блоками не бывает.
+    runs = [open_sorted(path) for path in paths]
+    offsets = [0] * len(runs)
+    while True:
+        active = [index for index, run in enumerate(runs) if offsets[index] < len(run)]
+        if not active:
+            return
+        per_run = max(1, block // len(active))
+        windows = [(index, runs[index][offsets[index]:offsets[index] + per_run]) for index in active]
+        bound = min(window[-1] for _, window in windows)
+        parts = []
+        for index, window in windows:
+            take = int(np.searchsorted(window, bound, side='right'))
+            parts.append(np.asarray(window[:take]))
+            offsets[index] += take
+        yield np.unique(np.concatenate(parts))
+
+
+def drop_known(chunk, layer, block):
+    # Убирает из отсортированного chunk позиции, уже лежащие в слое.
+    if not len(chunk) or not len(layer):
+        return chunk
+    kept = []
+    start = int(np.searchsorted(layer, chunk[0]))
+    index = 0
+    while index < len(chunk):
+        window = np.asarray(layer[start:start + block])
+        if not len(window):
+            kept.append(chunk[index:])
+            break
+        stop = index + int(np.searchsorted(chunk[index:], window[-1], side='right'))
+        part = chunk[index:stop]
+        kept.append(part[~np.isin(part, window, assume_unique=True)])
+        index = stop
+        start += block
+    return np.concatenate(kept) if kept else chunk[:0]
+
+
+class ExternalBFS:
+    def __init__(self, num_disks, directory=None, target=NUM_PEGS - 1, memory_budget=1 << 30):
+        self.num_disks = num_disks
+        self.target = target
+        # Временный каталог, созданный здесь, удаляется в close().
+        self.temporary = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix='hanoi-bfs-')
+        os.makedirs(self.directory, exist_ok=True)
+        self.chunk_states = max(MIN_CHUNK_STATES, memory_budget // (BYTES_PER_DISK * num_disks))
+        self.layer_sizes = []
+        self.run_count = 0
+
+    def close(self):
+        if self.temporary and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def layer_path(self, depth):
+        return os.path.join(self.directory, f"layer-{depth:05d}.bin")
+
+    def new_run_path(self):
+        self.run_count += 1
+        return os.path.join(self.directory, f"run-{self.run_count:05d}.bin")
+
+    def build(self):
+        goal = encode(np.full((1, self.num_disks), self.target, dtype=np.uint8))
+        goal.tofile(self.layer_path(0))
+        self.layer_sizes = [1]
+        depth = 0
+        while self.layer_sizes[-1]:
+            depth += 1
+            runs = self.reduce_runs(self.write_runs(depth - 1))
+            size = self.merge_layer(runs, depth)
+            for path in runs:
+                os.remove(path)
+            if not size:
+                os.remove(self.layer_path(depth))
+                break
+            self.layer_sizes.append(size)
+        return self
+
+    def write_runs(self, depth):
+        frontier = open_sorted(self.layer_path(depth))
+        runs = []
+        for start in range(0, len(frontier), self.chunk_states):
+            chunk = np.asarray(frontier[start:start + self.chunk_states])
+            found = np.unique(neighbours(chunk, self.num_disks, self.target))
+            path = self.new_run_path()
+            found.tofile(path)
+            runs.append(path)
+        return runs
+
+    def reduce_runs(self, runs):
+        while len(runs) > MERGE_FAN_IN:
+            merged = []
+            for start in range(0, len(runs), MERGE_FAN_IN):
+                group = runs[start:start + MERGE_FAN_IN]
+                path = self.new_run_path()
+                with open(path, 'wb') as output:
+                    for chunk in merge_runs(group, self.chunk_states):
+                        chunk.tofile(output)
+                for old in group:
+                    os.remove(old)
+                merged.append(path)
+            runs = merged
+        return runs
+
+    def merge_layer(self, runs, depth):
+        known = [open_sorted(self.layer_path(depth - 1))]
+        if depth >= 2:
+            known.append(open_sorted(self.layer_path(depth - 2)))
+        size = 0
+        with open(self.layer_path(depth), 'wb') as output:
+            for chunk in merge_runs(runs, self.chunk_states):
+                for layer in known:
+                    chunk = drop_known(chunk, layer, self.chunk_states)
+                chunk.tofile(output)
+                size += len(chunk)
+        return size
+
+    def distance(self, positions):
+        positions = np.asarray(positions, dtype=np.uint8)[np.newaxis, :]
+        state_id = encode(canonicalize(positions, self.target))[0]
+        for depth in range(len(self.layer_sizes)):
+            layer = open_sorted(self.layer_path(depth))
+            index = int(np.searchsorted(layer, state_id))
+            if index < len(layer) and layer[index] == state_id:
+                return depth
+        raise ValueError("Позиция не найдена: таблица не построена")
+
+    def eccentricity(self):
+        return len(self.layer_sizes) - 1
@@ -0,0 +1,211 @@
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+# Точные расстояния до башни на целевом стержне для четырёх стержней.
+#
+# Позиция кодируется двумя битами на диск (цифра i в системе по
+# основанию 4 - стержень диска i + 1). Для каждой позиции в упакованном
+# массиве хранится 2 бита: глубина BFS по модулю 3 или 3 для ещё не
+# достигнутых. Этого хватает, чтобы восстановить точное расстояние: у
+# соседа на шаг ближе к цели значение ровно на единицу меньше по модулю 3.
+#
+# Нецелевые стержни равноправны, поэтому хранятся только канонические
+# позиции: нецелевые стержни переименованы в порядке появления от самого
+# большого диска. Это сокращает работу BFS примерно в шесть раз.
+#
+# Каждый слой делится на части, которые обрабатывает пул процессов:
+# воркер строит соседей, приводит их к каноническому виду и отбрасывает
+# уже посещённые по общему массиву в shared memory. Родитель объединяет
+# результаты и записывает новый слой между вызовами пула.
+
+UNVISITED = 3
+NUM_PEGS = 4
+CHUNK_STATES = 1 << 18
+
+worker_state = {}
+
+
+def attach_worker(name, num_disks, target):
+    memory = shared_memory.SharedMemory(name=name)
+    worker_state['memory'] = memory
+    worker_state['packed'] = np.ndarray((memory.size,), dtype=np.uint8, buffer=memory.buf)
+    worker_state['num_disks'] = num_disks
+    worker_state['target'] = target
+
+
+def decode(state_ids, num_disks):
+    shifts = 2 * np.arange(num_disks, dtype=np.uint64)
+    return ((state_ids[:, np.newaxis] >> shifts) & np.uint64(3)).astype(np.uint8)
+
+
+def encode(positions):
+    shifts = 2 * np.arange(positions.shape[1], dtype=np.uint64)
+    return (positions.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+
+
+def canonicalize(positions, target):
+    # Нецелевые стержни получают метки по убыванию самого большого диска
+    # на них; пустые стержни идут последними в порядке номеров.
+    count, num_disks = positions.shape
+    free_pegs = [peg for peg in range(NUM_PEGS) if peg != target]
+    bottoms = np.empty((count, len(free_pegs)), dtype=np.int64)
+    for index, peg in enumerate(free_pegs):
+        on_peg = positions[:, ::-1] == peg
+        bottoms[:, index] = np.where(on_peg.any(axis=1), num_disks - on_peg.argmax(axis=1), 0)
+    mapping = np.empty((count, NUM_PEGS), dtype=np.uint8)
+    mapping[:, target] = target
+    for index, peg in enumerate(free_pegs):
+        rank = np.zeros(count, dtype=np.int64)
+        for other in range(len(free_pegs)):
+            if other < index:
+                rank += bottoms[:, other] >= bottoms[:, index]
+            elif other > index:
+                rank += bottoms[:, other] > bottoms[:, index]
+        mapping[:, peg] = np.array(free_pegs, dtype=np.uint8)[rank]
+    return np.take_along_axis(mapping, positions.astype(np.int64), axis=1)
+
+
+def read_values(packed, state_ids):
+    shifts = ((state_ids & np.uint64(3)) << np.uint64(1)).astype(np.uint8)
+    return (packed[(state_ids >> np.uint64(2)).astype(np.int64)] >> shifts) & 3
+
+
+def neighbours(state_ids, num_disks, target):
+    moved = neighbour_positions(state_ids, num_disks)
+    if not len(moved):
+        return np.empty(0, dtype=np.uint64)
+    return encode(canonicalize(moved, target))
+
+
+def neighbour_positions(state_ids, num_disks):
+    positions = decode(state_ids, num_disks)
+    tops = np.empty((len(state_ids), NUM_PEGS), dtype=np.int64)
+    for peg in range(NUM_PEGS):
+        on_peg = positions == peg
+        tops[:, peg] = np.where(on_peg.any(axis=1), on_peg.argmax(axis=1), num_disks)
+    found = []
+    for from_peg in range(NUM_PEGS):
+        for to_peg in range(NUM_PEGS):
+            if from_peg == to_peg:
+                continue
+            legal = tops[:, from_peg] < tops[:, to_peg]
+            if not legal.any():
+                continue
+            moved = positions[legal].copy()
+            moved[np.arange(len(moved)), tops[legal, from_peg]] = to_peg
+            found.append(moved)
+    if not found:
+        return positions[:0]
+    return np.concatenate(found)
+
+
+def expand_chunk(frontier):
+    packed = worker_state['packed']
+    candidates = neighbours(frontier, worker_state['num_disks'], worker_state['target'])
+    candidates = candidates[read_values(packed, candidates) == UNVISITED]
+    return np.unique(candidates)
+
+
+class FourPegDistances:
+    def __init__(self, num_disks, target=NUM_PEGS - 1, processes=None):
+        self.num_disks = num_disks
+        self.target = target
+        self.processes = processes or os.cpu_count() or 1
+        num_bytes = max(1, (NUM_PEGS ** num_disks + 3) // 4)
+        self.memory = shared_memory.SharedMemory(create=True, size=num_bytes)
+        self.packed = np.ndarray((num_bytes,), dtype=np.uint8, buffer=self.memory.buf)
+        self.packed[:] = 0xFF
+        self.layer_sizes = []
+
+    @classmethod
+    def load(cls, num_disks, target=NUM_PEGS - 1, cache=None):
+        # Готовая таблица из постоянного кэша (см. cache.py) или None.
+        packed = cache.load('bfs4', num_disks, target) if cache is not None else None
+        if packed is None:
+            return None
+        table = object.__new__(cls)
+        table.num_disks = num_disks
+        table.target = target
+        table.processes = 1
+        table.memory = None
+        table.packed = packed
+        layer_sizes = cache.load('bfs4-layers', num_disks, target)
+        table.layer_sizes = [] if layer_sizes is None else layer_sizes.tolist()
+        return table
+
+    def save(self, cache):
+        cache.store('bfs4-layers', self.num_disks, np.array(self.layer_sizes, dtype=np.uint64), self.target)
+        cache.store('bfs4', self.num_disks, self.packed, self.target)
+
+    def close(self):
+        self.packed = None
+        if self.memory is not None:
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_layer(self, state_ids, depth):
+        # Все позиции слоя ещё не посещены (11), поэтому XOR с (11 ^ v)
+        # записывает v; маски позиций одного байта не пересекаются и
+        # объединяются через reduceat.
+        value = np.uint8(UNVISITED ^ depth % 3)
+        shifts = ((state_ids & np.uint64(3)) << np.uint64(1)).astype(np.uint8)
+        masks = (value << shifts).astype(np.uint8)
+        byte_index = (state_ids >> np.uint64(2)).astype(np.int64)
+        unique_bytes, starts = np.unique(byte_index, return_index=True)
+        self.packed[unique_bytes] ^= np.bitwise_or.reduceat(masks, starts)
+
+    def build(self):
+        goal = np.array([encode(np.full((1, self.num_disks), self.target, dtype=np.uint8))[0]], dtype=np.uint64)
+        self.write_layer(goal, 0)
+        self.layer_sizes = [1]
+        frontier = goal
+        depth = 0
+        with Pool(self.processes, initializer=attach_worker,
+                  initargs=(self.memory.name, self.num_disks, self.target)) as pool:
+            while len(frontier):
+                depth += 1
+                parts = max(self.processes, -(-len(frontier) // CHUNK_STATES))
+                chunks = [chunk for chunk in np.array_split(frontier, parts) if len(chunk)]
+                found = pool.map(expand_chunk, chunks)
+                frontier = np.unique(np.concatenate(found))
+                if len(frontier):
+                    self.write_layer(frontier, depth)
+                    self.layer_sizes.append(len(frontier))
+        return self
+
+    def canonical_id(self, positions):
+        positions = np.asarray(positions, dtype=np.uint8)[np.newaxis, :]
+        return encode(canonicalize(positions, self.target))
+
+    def depth_mod3(self, state_ids):
+        return read_values(self.packed, state_ids)
+
+    def distance(self, positions):
+        current = self.canonical_id(positions)
+        value = int(self.depth_mod3(current)[0])
+        if value == UNVISITED:
+            raise ValueError("Позиция не найдена: таблица не построена")
+        steps = 0
+        while not self.is_goal(current):
+            closer = (value - 1) % 3
+            options = neighbours(current, self.num_disks, self.target)
+            current = options[self.depth_mod3(options) == closer][:1]
+            value = closer
+            steps += 1
+        return steps
+
+    def is_goal(self, state_id):
+        positions = decode(state_id, self.num_disks)
+        return bool((positions == self.target).all())
+
+    def eccentricity(self):
+        return len(self.layer_sizes) - 1
@@ -0,0 +1,89 @@
+import numpy as np
+
+from solver import solution_moves
+
+# Алгоритм Фрейма-Стюарта для k >= 4 стержней: верхние t дисков
+# перекладываются на промежуточный стержень всеми k стержнями, оставшиеся
+# n - t дисков - на цель без этого стержня (k - 1 стержень), затем t дисков
+# идут на цель снова всеми k стержнями.
+#
+# FS(n, k) = min_t 2 * FS(t, k) + FS(n - t, k - 1). Функция под минимумом
+# выпукла по t, а лучший t не убывает с ростом n, поэтому для каждого k
+# таблица достраивается одним проходом с двумя указателями за O(n).
+
+tables = {}
+
+
+def table(num_pegs, num_disks):
+    if num_pegs < 3:
+        raise ValueError("Нужно хотя бы три стержня")
+    counts, splits = tables.setdefault(num_pegs, ([0], [0]))
+    while len(counts) <= num_disks:
+        disks = len(counts)
+        if num_pegs == 3 or disks == 1:
+            counts.append((1 << disks) - 1)
+            splits.append(disks - 1)
+            continue
+        smaller = table(num_pegs - 1, disks)[0]
+        split = max(1, splits[-1])
+        best = 2 * counts[split] + smaller[disks - split]
+        while split + 1 < disks:
+            cost = 2 * counts[split + 1] + smaller[disks - split - 1]
+            if cost > best:
+                break
+            split += 1
+            best = cost
+        counts.append(best)
+        splits.append(split)
+    return counts, splits
+
+
+def warm_table(num_pegs, num_disks, cache):
+    # Таблица для num_pegs стержней из постоянного кэша; если там она
+    # короче нужной, достраивается и сохраняется, пока числа ходов
+    # помещаются в uint64.
+    variant = f"frame-stewart{num_pegs}"
+    stored = cache.load(variant, 0)
+    if stored is not None and stored.shape[1] > len(tables.get(num_pegs, ([0],))[0]):
+        tables[num_pegs] = ([int(count) for count in stored[0]], [int(split) for split in stored[1]])
+    counts, splits = table(num_pegs, num_disks)
+    if (stored is None or stored.shape[1] < len(counts)) and counts[-1] < 1 << 64:
+        cache.store(variant, 0, np.array([counts, splits], dtype=np.uint64))
+    return counts, splits
+
+
+def move_count(num_disks, num_pegs=4):
+    return table(num_pegs, num_disks)[0][num_disks]
+
+
+def best_split(num_disks, num_pegs=4):
+    return table(num_pegs, num_disks)[1][num_disks]
+
+
+def tower_moves(num_disks, source, target, spare):
+    labels = (source, spare, target)
+    for from_peg, to_peg in solution_moves(num_disks, 0, 2):
+        yield labels[from_peg], labels[to_peg]
+
+
+def frame_stewart_moves(num_disks, num_pegs=4, source=0, target=None):
+    if target is None:
+        target = num_pegs - 1
+    spares = tuple(peg for peg in range(num_pegs) if peg != source and peg != target)
+    table(num_pegs, num_disks)
+    tasks = [(num_disks, source, target, spares)]
+    while tasks:
+        disks, from_peg, to_peg, free = tasks.pop()
+        if not disks:
+            continue
+        if disks == 1:
+            yield from_peg, to_peg
+        elif len(free) == 1:
+            yield from tower_moves(disks, from_peg, to_peg, free[0])
+        else:
+            top = best_split(disks, len(free) + 2)
+            middle = free[0]
+            rest = free[1:]
+            tasks.append((top, middle, to_peg, rest + (from_peg,)))
+            tasks.append((disks - top, from_peg, to_peg, rest))
+            tasks.append((top, from_peg, middle, rest + (to_peg,)))
@@ -1,39 +1,134 @@
 import sys
 import json
+from itertools import islice
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QMessageBox,
-    QHBoxLayout, QLabel, QDialog, QDialogButtonBox, QScrollArea
+    QHBoxLayout, QLabel, QDialog, QDialogButtonBox, QScrollArea, QSpinBox,
+    QLineEdit, QComboBox
 )
 from PyQt6.QtCore import Qt, QTimer, QPoint, QUrl, pyqtSignal, QRect
 from PyQt6.QtGui import QPainter, QColor, QBrush, QIcon, QLinearGradient, QPalette, QFont
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+from bicolor import BicolorEngine
+from clock import GameTimer
+from engine import HanoiEngine
+from events import EventBus, GameWon, LevelChanged, MoveApplied
+from pattern_db import MAX_HINT_DISKS, PatternHintTracker
+from solver import HintTracker, distance, path_moves, positions_after, solution_length
+
+BASE_DISKS = 3
+MAX_DISKS = 128
+FRAME_INTERVAL = 16
+AUTO_SOLVE_INTERVAL = 200
+AUTO_SOLVE_TICKS = 300
+MAX_AUTO_SOLVE_BATCH = 100000
+CLASSIC = 'classic'
+FOUR_PEGS = 'four_pegs'
+BICOLOR = 'bicolor'
+
+# Варианты игры: название в списке и движок для заданного числа дисков.
+# Автосборка и переход к шагу решения есть только в классике, подсказка -
+# в классике и на четырёх стержнях.
+VARIANTS = {
+    CLASSIC: ("Классика", lambda num_disks: HanoiEngine(num_disks)),
+    FOUR_PEGS: ("Четыре стержня", lambda num_disks: HanoiEngine(num_disks, 4, 0, 3)),
+    BICOLOR: ("Двухцветная башня", lambda num_disks: BicolorEngine(num_disks)),
+}
+
+
+def format_time(total_seconds):
+    hours, rest = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes:02}:{seconds:02}"
+
+
+def record_key(level, num_disks, variant=CLASSIC):
+    if num_disks == BASE_DISKS + level - 1:
+        key = str(level)
+    else:
+        key = f"disks:{num_disks}"
+    if variant != CLASSIC:
+        return f"{variant}:{key}"
+    return key
+
+
+def parse_record_key(key):
+    # Обратная к record_key: (вариант, 'level' или 'disks', число) или None.
+    parts = key.split(":")
+    variant = parts.pop(0) if parts[0] in VARIANTS else CLASSIC
+    if len(parts) == 1 and parts[0].isdigit():
+        return variant, 'level', int(parts[0])
+    if len(parts) == 2 and parts[0] == "disks" and parts[1].isdigit():
+        return variant, 'disks', int(parts[1])
+    return None
+
 
 class HanoiTowersGame(QWidget):
     return_to_menu = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, num_disks=BASE_DISKS, clock=None):
         super().__init__()
         self.setWindowIcon(QIcon('pictures/icon.ico'))
-        self.num_disks = 3
+        self.num_disks = num_disks
         self.level = 1
         self.max_levels = 5
-        self.pegs = [[], [], []]
+        self.bus = EventBus(on_pending=self.schedule_flush)
+        self.variant = CLASSIC
+        self.engine = VARIANTS[self.variant][1](self.num_disks)
+        self.engine.bus = self.bus
+        self.branch_origin = None
+        self.start_positions = None
+        self.target_positions = None
         self.selected_disk = None
         self.selected_peg = None
-        self.move_count = 0
-        self.time_elapsed = 0
+        self.game_timer = GameTimer(clock)
         self.records = self.load_records()
         self.mouse_pos = QPoint()
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_timer)
+        self.solve_timer = QTimer(self)
+        self.solve_timer.timeout.connect(self.auto_solve_step)
+        self.solution = None
+        self.solve_engine = None
+        self.assisted = False
+        self.hint = None
         self.music_enabled = True
-        self.completed_levels = set()
+        # Пройденные уровни у каждого варианта свои.
+        self.completed_levels = {variant: set() for variant in VARIANTS}
         self.base_font_size = 12
         
         self.set_gradient_background()
         self.init_audio()
+        self.subscribe_events()
         self.initUI()
 
+    def subscribe_events(self):
+        self.bus.subscribe(MoveApplied, self.on_move_for_hint)
+        self.bus.subscribe(MoveApplied, self.on_board_changed, coalesce=True)
+        self.bus.subscribe(MoveApplied, lambda event: self.click_player.play(), coalesce=True)
+        self.bus.subscribe(GameWon, lambda event: self.stop_timer(), coalesce=True)
+        self.bus.subscribe(GameWon, lambda event: self.win_player.play(), coalesce=True)
+        self.bus.subscribe(GameWon, lambda event: self.update_record(), coalesce=True)
+        self.bus.subscribe(GameWon, self.on_game_won, coalesce=True)
+        self.bus.subscribe(LevelChanged, self.on_level_changed, coalesce=True)
+
+    def schedule_flush(self):
+        QTimer.singleShot(FRAME_INTERVAL, self.bus.flush)
+
+    @property
+    def pegs(self):
+        return self.engine.peg_lists()
+
+    @property
+    def time_elapsed(self):
+        return int(self.game_timer.elapsed())
+
+    @property
+    def move_count(self):
+        return self.engine.move_count
+
     def set_gradient_background(self):
         gradient = QLinearGradient(0, 0, self.width(), self.height())
         gradient.setColorAt(0, QColor(75, 0, 130))
@@ -81,9 +176,12 @@ class HanoiTowersGame(QWidget):
             json.dump(self.records, f, indent=4)
 
     def update_record(self):
-        current_record = self.records.get(str(self.level), {}).get('time', float('inf'))
+        if self.assisted:
+            return
+        key = record_key(self.level, self.num_disks, self.variant)
+        current_record = self.records.get(key, {}).get('time', float('inf'))
         if self.time_elapsed < current_record:
-            self.records[str(self.level)] = {"time": self.time_elapsed}
+            self.records[key] = {"time": self.time_elapsed}
             self.save_records()
             self.update_timer_display()
 
@@ -132,7 +230,7 @@ class HanoiTowersGame(QWidget):
 
         self.new_game_button = QPushButton("Новая игра", self)
         self.new_game_button.setStyleSheet(button_style)
-        self.new_game_button.clicked.connect(self.new_game)
+        self.new_game_button.clicked.connect(lambda: self.new_game())
 
         self.next_level_button = QPushButton("Следующий уровень", self)
         self.next_level_button.setStyleSheet(button_style)
@@ -144,23 +242,75 @@ class HanoiTowersGame(QWidget):
         self.previous_level_button.clicked.connect(self.previous_level)
         self.previous_level_button.setEnabled(self.level > 1)
 
+        self.undo_button = QPushButton("Отменить ход", self)
+        self.undo_button.setStyleSheet(button_style)
+        self.undo_button.setShortcut("Ctrl+Z")
+        self.undo_button.clicked.connect(self.undo_move)
+
+        self.redo_button = QPushButton("Вернуть ход", self)
+        self.redo_button.setStyleSheet(button_style)
+        self.redo_button.setShortcut("Ctrl+Y")
+        self.redo_button.clicked.connect(self.redo_move)
+
+        self.branch_button = QPushButton("Попробовать вариант", self)
+        self.branch_button.setStyleSheet(button_style)
+        self.branch_button.clicked.connect(self.toggle_branch)
+
+        self.solve_button = QPushButton("Автосборка", self)
+        self.solve_button.setStyleSheet(button_style)
+        self.solve_button.clicked.connect(self.toggle_auto_solve)
+
+        self.hint_button = QPushButton("Подсказка", self)
+        self.hint_button.setStyleSheet(button_style)
+        self.hint_button.clicked.connect(self.toggle_hint)
+
+        self.step_edit = QLineEdit(self)
+        self.step_edit.setPlaceholderText("Шаг решения")
+        self.step_edit.setStyleSheet("color: white; background: rgba(0, 0, 0, 0.3);")
+        self.step_edit.returnPressed.connect(self.jump_to_entered_step)
+
         self.level_label = QLabel(f"Уровень: {self.level}", self)
         self.level_label.setStyleSheet("color: white;")
 
+        self.disks_label = QLabel("Дисков:", self)
+        self.disks_label.setStyleSheet("color: white;")
+        self.disks_spin = QSpinBox(self)
+        self.disks_spin.setRange(1, MAX_DISKS)
+        self.disks_spin.setValue(self.num_disks)
+        self.disks_spin.valueChanged.connect(self.set_disk_count)
+
+        self.variant_combo = QComboBox(self)
+        for variant, (title, _) in VARIANTS.items():
+            self.variant_combo.addItem(title, variant)
+        self.variant_combo.currentIndexChanged.connect(
+            lambda index: self.set_variant(self.variant_combo.itemData(index)))
+
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.menu_button)
         button_layout.addWidget(self.new_game_button)
         button_layout.addWidget(self.previous_level_button)
         button_layout.addWidget(self.next_level_button)
+        button_layout.addWidget(self.undo_button)
+        button_layout.addWidget(self.redo_button)
+        button_layout.addWidget(self.branch_button)
+        button_layout.addWidget(self.solve_button)
+        button_layout.addWidget(self.hint_button)
+        button_layout.addWidget(self.step_edit)
         button_layout.addWidget(self.level_label)
+        button_layout.addWidget(self.disks_label)
+        button_layout.addWidget(self.disks_spin)
+        button_layout.addWidget(self.variant_combo)
 
         time_layout = QVBoxLayout()
         self.time_label = QLabel("Время выполнения: 00:00", self)
         self.time_label.setStyleSheet("color: white;")
         self.record_label = QLabel("Рекорд: --:--", self)
         self.record_label.setStyleSheet("color: white;")
+        self.moves_label = QLabel("Ходов: 0", self)
+        self.moves_label.setStyleSheet("color: white;")
         time_layout.addWidget(self.time_label)
         time_layout.addWidget(self.record_label)
+        time_layout.addWidget(self.moves_label)
         time_layout.setSpacing(5)
 
         main_layout.addStretch(1)
@@ -178,14 +328,20 @@ class HanoiTowersGame(QWidget):
         button_font.setPointSize(int(self.base_font_size * font_multiplier))
         
         for button in [self.menu_button, self.new_game_button, 
-                      self.next_level_button, self.previous_level_button]:
+                      self.next_level_button, self.previous_level_button,
+                      self.undo_button, self.redo_button, self.branch_button,
+                      self.solve_button, self.hint_button]:
             button.setFont(button_font)
         
         label_font = QFont()
         label_font.setPointSize(int(self.base_font_size * font_multiplier))
         
-        for label in [self.level_label, self.time_label, self.record_label]:
+        for label in [self.level_label, self.time_label, self.record_label,
+                      self.moves_label, self.disks_label]:
             label.setFont(label_font)
+        self.disks_spin.setFont(label_font)
+        self.variant_combo.setFont(label_font)
+        self.step_edit.setFont(label_font)
 
     def toggle_music(self):
         self.music_enabled = not self.music_enabled
@@ -251,57 +407,238 @@ class HanoiTowersGame(QWidget):
         self.return_to_menu.emit()
         self.close()
 
-    def new_game(self):
-        self.pegs = [[], [], []]
-        for i in range(self.num_disks, 0, -1):
-            self.pegs[0].append(i)
-        self.move_count = 0
-        self.time_elapsed = 0
+    def new_game(self, start=None, target=None):
+        self.stop_auto_solve()
+        if start is not None:
+            self.start_positions = list(start)
+        if target is not None:
+            self.target_positions = list(target)
+        if self.branch_origin is not None:
+            self.engine = self.branch_origin
+            self.branch_origin = None
+            self.branch_button.setText("Попробовать вариант")
+        self.engine.num_disks = self.num_disks
+        self.engine.new_game(self.start_positions, self.target_positions)
+        self.assisted = False
+        self.update_variant_buttons_state()
+        self.game_timer.reset()
+        self.game_timer.start()
         self.update_timer_display()
+        self.update_moves_display()
         self.timer.start(1000)
+        self.reset_hint()
         self.update()
         self.update_level_buttons_state()
 
     def next_level(self):
         if self.level < self.max_levels:
             self.level += 1
-            self.num_disks += 1
-            self.level_label.setText(f"Уровень: {self.level}")
+            self.set_level_disks()
             self.new_game()
+            self.bus.publish(LevelChanged(self.level, self.num_disks))
         else:
             QMessageBox.information(self, "Поздравляем!", "Вы прошли все уровни!")
 
-        self.update_level_buttons_state()
-
     def previous_level(self):
         if self.level > 1:
             self.level -= 1
-            self.num_disks -= 1
-            self.level_label.setText(f"Уровень: {self.level}")
+            self.set_level_disks()
             self.new_game()
+            self.bus.publish(LevelChanged(self.level, self.num_disks))
+
+    def on_level_changed(self, event):
+        self.level_label.setText(f"Уровень: {event.level}")
+        self.update_timer_display()
         self.update_level_buttons_state()
 
+    def set_level_disks(self):
+        self.num_disks = BASE_DISKS + self.level - 1
+        self.start_positions = None
+        self.target_positions = None
+        self.disks_spin.blockSignals(True)
+        self.disks_spin.setValue(self.num_disks)
+        self.disks_spin.blockSignals(False)
+
+    def set_disk_count(self, num_disks):
+        self.num_disks = num_disks
+        self.start_positions = None
+        self.target_positions = None
+        self.new_game()
+
+    def set_variant(self, variant):
+        self.stop_auto_solve()
+        self.variant = variant
+        self.branch_origin = None
+        self.branch_button.setText("Попробовать вариант")
+        self.engine = VARIANTS[variant][1](self.num_disks)
+        self.engine.bus = self.bus
+        self.start_positions = None
+        self.target_positions = None
+        self.new_game()
+
+    def update_variant_buttons_state(self):
+        classic = self.variant == CLASSIC
+        self.solve_button.setEnabled(classic)
+        self.step_edit.setEnabled(classic)
+        self.hint_button.setEnabled(
+            classic or self.variant == FOUR_PEGS and self.num_disks <= MAX_HINT_DISKS)
+
     def update_level_buttons_state(self):
-        self.next_level_button.setEnabled(self.level in self.completed_levels and self.level < self.max_levels)
+        self.next_level_button.setEnabled(self.level in self.completed_levels[self.variant] and self.level < self.max_levels)
         self.previous_level_button.setEnabled(self.level > 1)
+        self.update_history_buttons_state()
+
+    def update_history_buttons_state(self):
+        self.undo_button.setEnabled(self.engine.history.can_undo())
+        self.redo_button.setEnabled(self.engine.history.can_redo())
+
+    def toggle_auto_solve(self):
+        if self.solution is not None:
+            self.stop_auto_solve()
+            return
+        start = self.engine.positions()
+        target = self.engine.target_positions
+        total = distance(start, target)
+        if not total:
+            return
+        self.selected_disk = None
+        self.selected_peg = None
+        # Партия, собранная автоматически, не даёт рекорда и не открывает уровень.
+        self.assisted = True
+        self.solution = path_moves(start, target)
+        self.solve_engine = self.engine
+        self.solve_batch = min(MAX_AUTO_SOLVE_BATCH, max(1, total // AUTO_SOLVE_TICKS))
+        self.solve_button.setText("Остановить")
+        self.solve_timer.start(AUTO_SOLVE_INTERVAL if self.solve_batch == 1 else FRAME_INTERVAL)
+
+    def stop_auto_solve(self):
+        if self.solution is None:
+            return
+        self.solve_timer.stop()
+        self.solution = None
+        self.solve_engine = None
+        self.solve_button.setText("Автосборка")
+
+    def auto_solve_step(self):
+        # Если доску подменили (ветка, новая партия), план больше не подходит.
+        if self.engine is not self.solve_engine:
+            self.stop_auto_solve()
+            return
+        batch = list(islice(self.solution, self.solve_batch))
+        if len(batch) == 1:
+            applied = self.engine.move(*batch[0])
+        else:
+            applied = not batch or self.engine.apply_moves(batch) is None
+        if not applied or len(batch) < self.solve_batch:
+            self.stop_auto_solve()
+
+    def jump_to_entered_step(self):
+        text = self.step_edit.text().strip()
+        try:
+            step = int(text) if text.isdecimal() else -1
+        except ValueError:
+            step = -1
+        if not 0 <= step <= solution_length(self.num_disks):
+            QMessageBox.warning(self, "Шаг решения",
+                                f"Введите число от 0 до {solution_length(self.num_disks)}")
+            return
+        self.jump_to_step(step)
+
+    def jump_to_step(self, step):
+        self.new_game()
+        engine = self.engine
+        engine.load_positions(positions_after(engine.num_disks, step, engine.source, engine.target))
+        engine.move_count = step
+        # Позиция после прыжка получена не игроком, как и при автосборке.
+        self.assisted = step > 0
+        self.reset_hint()
+        self.update()
+        self.update_moves_display()
+        if engine.check_win():
+            self.bus.publish(GameWon(step))
+
+    def toggle_branch(self):
+        self.stop_auto_solve()
+        if self.branch_origin is None:
+            self.branch_origin = self.engine
+            self.engine = self.engine.fork()
+            self.engine.bus = self.bus
+            self.branch_button.setText("Вернуться к партии")
+        else:
+            self.engine = self.branch_origin
+            self.branch_origin = None
+            self.branch_button.setText("Попробовать вариант")
+        self.selected_disk = None
+        self.selected_peg = None
+        self.reset_hint()
+        self.update()
+        self.update_moves_display()
+        self.update_history_buttons_state()
+
+    def toggle_hint(self):
+        if self.hint is None:
+            self.hint = self.make_hint()
+            self.hint_button.setText("Скрыть подсказку")
+        else:
+            self.hint = None
+            self.hint_button.setText("Подсказка")
+        self.update()
+
+    def make_hint(self):
+        if self.variant == FOUR_PEGS:
+            return PatternHintTracker(self.engine)
+        return HintTracker(self.engine)
+
+    def reset_hint(self):
+        if self.hint is None:
+            return
+        if self.hint_button.isEnabled():
+            self.hint = self.make_hint()
+        else:
+            # Для новой доски подсказки нет (слишком много дисков).
+            self.hint = None
+            self.hint_button.setText("Подсказка")
+
+    def on_move_for_hint(self, event):
+        if self.hint is not None:
+            self.hint.observe(event.from_peg, event.to_peg, event.move_count)
+
+    def undo_move(self):
+        self.stop_auto_solve()
+        if self.engine.undo() is not None:
+            self.selected_disk = None
+            self.selected_peg = None
+
+    def redo_move(self):
+        self.stop_auto_solve()
+        if self.engine.redo() is not None:
+            self.selected_disk = None
+            self.selected_peg = None
+
+    def on_board_changed(self, event):
+        self.update()
+        self.update_moves_display()
+        self.update_history_buttons_state()
 
     def update_timer(self):
-        self.time_elapsed += 1
         self.update_timer_display()
 
+    def stop_timer(self):
+        self.game_timer.stop()
+        self.timer.stop()
+
     def update_timer_display(self):
-        minutes = self.time_elapsed // 60
-        seconds = self.time_elapsed % 60
-        self.time_label.setText(f"Время выполнения: {minutes:02}:{seconds:02}")
+        self.time_label.setText(f"Время выполнения: {format_time(self.time_elapsed)}")
 
-        record = self.records.get(str(self.level), {}).get('time', None)
+        record = self.records.get(record_key(self.level, self.num_disks, self.variant), {}).get('time', None)
         if record is not None:
-            record_minutes = record // 60
-            record_seconds = record % 60
-            self.record_label.setText(f"Рекорд: {record_minutes:02}:{record_seconds:02}")
+            self.record_label.setText(f"Рекорд: {format_time(record)}")
         else:
             self.record_label.setText("Рекорд: --:--")
 
+    def update_moves_display(self):
+        self.moves_label.setText(f"Ходов: {self.move_count:,}".replace(",", " "))
+
     def paintEvent(self, event):
         painter = QPainter(self)
         self.draw_pegs(painter)
@@ -311,16 +648,41 @@ class HanoiTowersGame(QWidget):
         peg_width = 10
         peg_height = self.height() // 2
         peg_color = QColor(139, 69, 19)
-        painter.setBrush(QBrush(peg_color))
+        target_color = QColor(50, 205, 50)
 
-        peg_spacing = self.width() // 4
-        for i in range(3):
+        peg_spacing = self.width() // (self.engine.num_pegs + 1)
+        for i in range(self.engine.num_pegs):
+            if self.selected_peg is not None and (self.selected_peg, i) in self.engine.legal_moves:
+                painter.setBrush(QBrush(target_color))
+            else:
+                painter.setBrush(QBrush(peg_color))
             x = peg_spacing + i * peg_spacing - peg_width // 2
             y = self.height() - peg_height
             painter.drawRect(x, y, peg_width, -peg_height)
 
-    def draw_disks(self, painter):
-        disk_height = 20
+        if self.hint is not None and self.hint.next_move is not None:
+            from_peg, to_peg = self.hint.next_move
+            marker_width = peg_spacing // 2
+            marker_y = self.height() - peg_height + 5
+            for peg, color in ((from_peg, QColor(255, 165, 0)), (to_peg, QColor(255, 215, 0))):
+                painter.setBrush(QBrush(color))
+                painter.drawRect(peg_spacing + peg * peg_spacing - marker_width // 2, marker_y, marker_width, 8)
+
+    def disk_height(self):
+        peg_height = self.height() // 2
+        return max(1, min(20, peg_height // max(1, self.engine.disk_count())))
+
+    def disk_width(self, disk_size):
+        max_width = self.width() // (self.engine.num_pegs + 1) - 10
+        if 50 + self.num_disks * 20 <= max_width:
+            return 50 + disk_size * 20
+        min_width = min(20, max_width)
+        if self.num_disks == 1:
+            return max_width
+        return min_width + (max_width - min_width) * (disk_size - 1) // (self.num_disks - 1)
+
+    def disk_brush_color(self, disk):
+        # Обычные диски красятся по размеру, в двухцветном варианте - по цвету диска.
         colors = [
             QColor(255, 128, 0),
             QColor(0, 255, 0),
@@ -330,29 +692,37 @@ class HanoiTowersGame(QWidget):
             QColor(0, 255, 255),
             QColor(128, 0, 128),
         ]
+        tower_colors = [QColor(245, 245, 245), QColor(50, 50, 50)]
+        disk_color = self.engine.disk_color(disk)
+        if disk_color is not None:
+            return tower_colors[disk_color]
+        return colors[self.engine.disk_size(disk) % len(colors)]
+
+    def draw_disks(self, painter):
+        disk_height = self.disk_height()
 
-        peg_spacing = self.width() // 4
+        peg_spacing = self.width() // (self.engine.num_pegs + 1)
         peg_height = self.height() // 2
 
         for peg_index, peg in enumerate(self.pegs):
             x_base = peg_spacing + peg_index * peg_spacing
-            for disk_index, disk_size in enumerate(peg):
-                disk_width = 50 + disk_size * 20
+            for disk_index, disk in enumerate(peg):
+                disk_width = self.disk_width(self.engine.disk_size(disk))
                 x = x_base - disk_width // 2
                 y = self.height() - (disk_index + 1) * disk_height - (self.height() - peg_height)
 
-                color = colors[disk_size % len(colors)]
-                if peg_index == self.selected_peg and disk_size == self.selected_disk:
+                color = self.disk_brush_color(disk)
+                if peg_index == self.selected_peg and disk == self.selected_disk:
                     color.setAlpha(128)
                 
                 painter.setBrush(QBrush(color))
                 painter.drawRect(x, y, disk_width, disk_height)
 
         if self.selected_disk is not None:
-            disk_width = 50 + self.selected_disk * 20
+            disk_width = self.disk_width(self.engine.disk_size(self.selected_disk))
             x = self.mouse_pos.x() - disk_width // 2
             y = self.mouse_pos.y() - disk_height // 2
-            color = colors[self.selected_disk % len(colors)]
+            color = self.disk_brush_color(self.selected_disk)
             color.setAlpha(128)
             painter.setBrush(QBrush(color))
             painter.drawRect(x, y, disk_width, disk_height)
@@ -360,8 +730,9 @@ class HanoiTowersGame(QWidget):
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             peg_index = self.get_peg_index(event.pos().x())
-            if peg_index is not None and self.pegs[peg_index]:
-                self.selected_disk = self.pegs[peg_index][-1]
+            if peg_index is not None and self.engine.top_disk(peg_index):
+                self.stop_auto_solve()
+                self.selected_disk = self.engine.top_disk(peg_index)
                 self.selected_peg = peg_index
                 self.mouse_pos = event.pos()
                 self.update()
@@ -375,23 +746,19 @@ class HanoiTowersGame(QWidget):
         if event.button() == Qt.MouseButton.LeftButton and self.selected_disk is not None:
             target_peg_index = self.get_peg_index(event.pos().x())
             if target_peg_index is not None and self.is_valid_move(target_peg_index):
-                self.pegs[self.selected_peg].pop()
-                self.pegs[target_peg_index].append(self.selected_disk)
-                self.move_count += 1
+                self.engine.move(self.selected_peg, target_peg_index)
                 self.selected_disk = None
                 self.selected_peg = None
-                self.update()
-                self.click_player.play()
-
-                if self.check_win():
-                    self.timer.stop()
-                    self.win_player.play()
-                    self.completed_levels.add(self.level)
-                    self.update_record()
-                    if self.level == self.max_levels:
-                        self.show_winner_dialog()
-                    else:
-                        self.show_win_message()
+
+    def on_game_won(self, event):
+        if self.assisted:
+            QMessageBox.information(self, "Автосборка", "Башня собрана с помощью. Рекорд и уровень не засчитаны.")
+            return
+        self.completed_levels[self.variant].add(self.level)
+        if self.level == self.max_levels:
+            self.show_winner_dialog()
+        else:
+            self.show_win_message()
 
     def show_win_message(self):
         dialog = QDialog(self)
@@ -485,26 +852,23 @@ class HanoiTowersGame(QWidget):
     def reset_game(self, dialog):
         dialog.close()
         self.level = 1
-        self.num_disks = 3
-        self.level_label.setText(f"Уровень: {self.level}")
+        self.set_level_disks()
+        self.completed_levels[self.variant] = set()
         self.new_game()
-        self.completed_levels = set()
-        self.update_level_buttons_state()
+        self.bus.publish(LevelChanged(self.level, self.num_disks))
 
     def get_peg_index(self, x):
-        peg_spacing = self.width() // 3
-        for i in range(3):
+        peg_spacing = self.width() // self.engine.num_pegs
+        for i in range(self.engine.num_pegs):
             if i * peg_spacing < x < (i + 1) * peg_spacing:
                 return i
         return None
 
     def is_valid_move(self, target_peg_index):
-        if not self.pegs[target_peg_index]:
-            return True
-        return self.selected_disk < self.pegs[target_peg_index][-1]
+        return self.engine.is_valid_move(self.selected_peg, target_peg_index)
 
     def check_win(self):
-        return len(self.pegs[2]) == self.num_disks
+        return self.engine.check_win()
 
 class RulesDialog(QDialog):
     def __init__(self):
@@ -611,15 +975,25 @@ class RecordsDialog(QDialog):
         content_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         records_text = ""
-        for level, data in sorted(self.records.items(), key=lambda x: int(x[0])):
-            if isinstance(data, dict):
-                time = data.get('time', 0)
-            else:
-                time = data
-                
-            minutes = time // 60
-            seconds = time % 60
-            records_text += f"Уровень {level}: {minutes:02}:{seconds:02}\n"
+        variant_records = {}
+        for key, data in self.records.items():
+            parsed = parse_record_key(key)
+            if parsed is not None:
+                variant, kind, number = parsed
+                variant_records.setdefault(variant, []).append((kind != 'level', number, data))
+        for variant, (title, _) in VARIANTS.items():
+            if variant not in variant_records:
+                continue
+            if variant != CLASSIC:
+                records_text += f"\n{title}:\n"
+            for by_disks, number, data in sorted(variant_records[variant], key=lambda x: x[:2]):
+                if isinstance(data, dict):
+                    time = data.get('time', 0)
+                else:
+                    time = data
+                label = "Дисков" if by_disks else "Уровень"
+                records_text += f"{label} {number}: {format_time(time)}\n"
+        records_text = records_text.strip()
         
         if not records:
             records_text = "Рекорды пока не установлены"
@@ -0,0 +1,86 @@
+from array import array
+
+
+class MoveLog:
+    # Ход (from_peg, to_peg) упакован в один байт: from_peg << 4 | to_peg.
+    # moves - ходы, сделанные после последнего ответвления, undone - стек
+    # отменённых ходов для redo. Более ранняя история лежит в base:
+    # неизменяемой цепочке сегментов (буфер, длина, предыдущий сегмент),
+    # которую разделяют все ветки, созданные через fork().
+    __slots__ = ('moves', 'undone', 'base', 'size')
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        segments = []
+        base = self.base
+        while base is not None:
+            segments.append(base)
+            base = base[2]
+        for moves, length, _ in reversed(segments):
+            for index in range(length):
+                code = moves[index]
+                yield code >> 4, code & 15
+        for code in self.moves:
+            yield code >> 4, code & 15
+
+    def clear(self):
+        self.moves = array('B')
+        self.undone = array('B')
+        self.base = None
+        self.size = 0
+
+    def append(self, from_peg, to_peg):
+        self.moves.append(from_peg << 4 | to_peg)
+        if self.undone:
+            self.undone = array('B')
+        self.size += 1
+
+    def extend(self, codes):
+        self.moves.frombytes(codes.tobytes())
+        if self.undone:
+            self.undone = array('B')
+        self.size += len(codes)
+
+    def can_undo(self):
+        return self.size > 0
+
+    def can_redo(self):
+        return bool(self.undone)
+
+    def undo(self):
+        if self.moves:
+            code = self.moves.pop()
+        elif self.size:
+            base = self.base
+            while not base[1]:
+                base = base[2]
+            moves, length, previous = base
+            code = moves[length - 1]
+            self.base = (moves, length - 1, previous)
+        else:
+            return None
+        self.undone.append(code)
+        self.size -= 1
+        return code >> 4, code & 15
+
+    def redo(self):
+        if not self.undone:
+            return None
+        code = self.undone.pop()
+        self.moves.append(code)
+        self.size += 1
+        return code >> 4, code & 15
+
+    def fork(self):
+        if self.moves:
+            self.base = (self.moves, len(self.moves), self.base)
+            self.moves = array('B')
+        branch = MoveLog()
+        branch.base = self.base
+        branch.size = self.size
+        return branch
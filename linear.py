@@ -0,0 +1,108 @@
+from functools import lru_cache
+
+from engine import RestrictedHanoiEngine
+
+# Линейный вариант: ходить можно только между соседними стержнями
+# (0 <-> 1, 1 <-> 2). Оптимальный перенос башни с края на край занимает
+# 3^n - 1 ходов и проходит через все 3^n позиций.
+#
+# Ход номер k (с единицы) в переносе 0 -> 2 делает диск 1 + v, где v -
+# число младших нулевых троичных цифр k. Ходы каждого диска повторяются с
+# периодом 4: 0 -> 1, 1 -> 2, 2 -> 1, 1 -> 0. Если k = 3^(d - 1) * m, то
+# это ход номер m - m // 3 диска d, поэтому любой ход считается за O(n).
+# Перенос 2 -> 0 - то же самое с зеркальными номерами стержней.
+#
+# Генератор отдаёт готовые блоки для LINEAR_BLOCK_DISKS младших дисков
+# (прямой и обратный по очереди), а по формуле считает только ходы
+# больших дисков между блоками.
+
+ADJACENT_MOVES = frozenset({(0, 1), (1, 0), (1, 2), (2, 1)})
+DISK_PATTERN = ((0, 1), (1, 2), (2, 1), (1, 0))
+LINEAR_BLOCK_DISKS = 8
+
+
+class LinearHanoiEngine(RestrictedHanoiEngine):
+    allowed = ADJACENT_MOVES
+
+    def __init__(self, num_disks=3, source=0, target=2):
+        super().__init__(num_disks, 3, source, target)
+
+
+def linear_solution_length(num_disks, source=0, target=2):
+    if source == target:
+        return 0
+    if source != 1 and target != 1:
+        return 3 ** num_disks - 1
+    return (3 ** num_disks - 1) // 2
+
+
+def end_to_end_move(step, source):
+    disk = 1
+    while step % 3 == 0:
+        step //= 3
+        disk += 1
+    from_peg, to_peg = DISK_PATTERN[(step - step // 3 - 1) % 4]
+    if source == 2:
+        return disk, 2 - from_peg, 2 - to_peg
+    return disk, from_peg, to_peg
+
+
+def linear_kth_move(num_disks, step, source=0, target=2):
+    # Ход номер step (с единицы): диск, стержень-источник, стержень-цель.
+    if not 1 <= step <= linear_solution_length(num_disks, source, target):
+        raise ValueError(f"Шаг {step} вне решения для {num_disks} дисков")
+    if source != 1 and target != 1:
+        return end_to_end_move(step, source)
+    if source == 1:
+        # Перенос с середины на край - перенос с края на середину задом наперёд.
+        length = linear_solution_length(num_disks, target, 1)
+        disk, from_peg, to_peg = linear_kth_move(num_disks, length - step + 1, target, 1)
+        return disk, to_peg, from_peg
+    # С края на середину: n - 1 дисков уходят на другой край, диск n
+    # встаёт на середину, дальше та же задача для n - 1 дисков.
+    for disk in range(num_disks, 0, -1):
+        block = 3 ** (disk - 1) - 1
+        if step <= block:
+            return end_to_end_move(step, source)
+        if step == block + 1:
+            return disk, source, 1
+        step -= block + 1
+        source = 2 - source
+
+
+@lru_cache(maxsize=None)
+def linear_blocks(block_disks, source):
+    length = 3 ** block_disks - 1
+    forward = tuple(end_to_end_move(step, source)[1:] for step in range(1, length + 1))
+    backward = tuple((to_peg, from_peg) for from_peg, to_peg in reversed(forward))
+    return forward, backward
+
+
+def end_to_end_moves(num_disks, source):
+    if num_disks <= 0:
+        return
+    block_disks = min(num_disks, LINEAR_BLOCK_DISKS)
+    blocks = linear_blocks(block_disks, source)
+    block_size = 3 ** block_disks
+    yield from blocks[0]
+    for index in range(1, 3 ** (num_disks - block_disks)):
+        yield end_to_end_move(index * block_size, source)[1:]
+        yield from blocks[index % 2]
+
+
+def linear_moves(num_disks, source=0, target=2):
+    if num_disks <= 0 or source == target:
+        return
+    if source != 1 and target != 1:
+        yield from end_to_end_moves(num_disks, source)
+    elif target == 1:
+        for disk in range(num_disks, 0, -1):
+            yield from end_to_end_moves(disk - 1, source)
+            yield source, 1
+            source = 2 - source
+    else:
+        end = target if num_disks % 2 else 2 - target
+        for disk in range(1, num_disks + 1):
+            yield 1, end
+            yield from end_to_end_moves(disk - 1, 2 - end)
+            end = 2 - end
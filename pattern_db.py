@@ -0,0 +1,194 @@
+import numpy as np
+
+from cache import default_cache
+from encoding import encode_state
+from four_peg_bfs import NUM_PEGS, encode, neighbour_positions
+from solver import HintTracker
+
+# Оптимальные ходы для четырёх стержней из произвольной позиции: IDA* с
+# аддитивной эвристикой по непересекающимся группам дисков.
+#
+# Группа из соседних по размеру дисков, рассмотренная отдельно от
+# остальных, ведёт себя как башня из стольких же дисков, поэтому одна
+# таблица на GROUP_DISKS дисков (расстояние каждой из 4^GROUP_DISKS
+# позиций до башни на стержне 3) годится для всех групп. Для группы
+# поменьше недостающие большие диски считаются уже стоящими на цели - они
+# не мешают меньшим. Каждый ход двигает один диск одной группы, так что
+# сумма расстояний по группам не больше настоящего расстояния.
+#
+# Таблица строится один раз (около 2 с) и хранится в постоянном кэше
+# (cache.py), откуда открывается через np.load(mmap_mode='r') без чтения
+# файла целиком. Найденные пути запоминаются в памяти по ID позиции.
+#
+# Эвристика по группам слабеет с ростом N: для башни из 20 дисков она даёт
+# 98 ходов из 289, и более крупные группы этого не исправляют. На случайных
+# позициях поиск в пределах MAX_SEARCH_NODES узлов находит путь для 10
+# дисков всегда (таблица покрывает их целиком), для 11 - в половине
+# случаев, для 12 - редко, дальше - никогда. Поэтому подсказка в игре
+# предлагается только до MAX_HINT_DISKS дисков.
+
+GROUP_DISKS = 10
+MAX_HINT_DISKS = GROUP_DISKS
+UNVISITED = 0xFF
+MAX_SEARCH_NODES = 20_000
+
+
+def build_table(group_disks=GROUP_DISKS):
+    distances = np.full(NUM_PEGS ** group_disks, UNVISITED, dtype=np.uint8)
+    goal = (NUM_PEGS ** group_disks - 1) // 3 * 3
+    frontier = np.array([goal], dtype=np.uint64)
+    distances[goal] = 0
+    level = 0
+    while len(frontier):
+        level += 1
+        candidates = encode(neighbour_positions(frontier, group_disks)).astype(np.int64)
+        candidates = candidates[distances[candidates] == UNVISITED]
+        frontier = np.unique(candidates).astype(np.uint64)
+        distances[frontier.astype(np.int64)] = level
+    return distances
+
+
+def load_table(group_disks=GROUP_DISKS, cache=None):
+    cache = cache or default_cache()
+    return cache.get_or_build('pdb4', group_disks, lambda: build_table(group_disks))
+
+
+class SearchLimitExceeded(Exception):
+    pass
+
+
+class PatternSearch:
+    def __init__(self, num_disks, group_disks=GROUP_DISKS, cache=None, max_nodes=MAX_SEARCH_NODES):
+        self.num_disks = num_disks
+        self.group_disks = group_disks
+        self.max_nodes = max_nodes
+        self.cache = cache or default_cache()
+        self.table = memoryview(load_table(group_disks, self.cache))
+        # Группы идут от самых маленьких дисков: (первый диск, размер, добавка
+        # за недостающие диски на целевом стержне).
+        self.groups = []
+        for low in range(0, num_disks, group_disks):
+            size = min(group_disks, num_disks - low)
+            padding = sum(3 << 2 * disk for disk in range(size, group_disks))
+            self.groups.append((low, size, padding))
+        self.group_of = [disk // group_disks for disk in range(num_disks)]
+        self.paths = {}
+
+    def heuristic(self, positions):
+        return sum(self.table[gid] for gid in self.group_ids(positions))
+
+    def group_ids(self, positions):
+        return [
+            padding + sum(positions[low + disk] << 2 * disk for disk in range(size))
+            for low, size, padding in self.groups
+        ]
+
+    def solve(self, positions, target=NUM_PEGS - 1):
+        # Стержни target и 3 меняются местами, чтобы цель совпала с таблицей;
+        # та же перестановка возвращает ходы к исходным номерам.
+        if len(positions) != self.num_disks:
+            raise ValueError("Позиция должна описывать все диски")
+        key = (target, encode_state(positions, NUM_PEGS))
+        if key in self.paths:
+            self.nodes = 0
+            return list(self.paths[key])
+        labels = list(range(NUM_PEGS))
+        labels[target], labels[NUM_PEGS - 1] = NUM_PEGS - 1, target
+        self.pegs = [labels[peg] for peg in positions]
+        self.masks = [0] * NUM_PEGS
+        for disk, peg in enumerate(self.pegs):
+            self.masks[peg] |= 1 << disk
+        self.ids = self.group_ids(self.pegs)
+        self.cost = sum(self.table[gid] for gid in self.ids)
+        self.path = []
+        self.nodes = 0
+        bound = self.cost
+        self.bounds = {}
+        while True:
+            found = self.search(0, bound, -1)
+            if found is True:
+                path = [(labels[from_peg], labels[to_peg]) for from_peg, to_peg in self.path]
+                self.paths[key] = tuple(path)
+                return path
+            bound = found
+
+    def next_move(self, positions, target=NUM_PEGS - 1):
+        path = self.solve(positions, target)
+        return path[0] if path else None
+
+    def state_key(self):
+        masks = self.masks
+        return masks[0] | masks[1] << self.num_disks | masks[2] << 2 * self.num_disks
+
+    def shift(self, disk, from_peg, to_peg):
+        group = self.group_of[disk]
+        old_id = self.ids[group]
+        new_id = old_id + ((to_peg - from_peg) << 2 * (disk - self.groups[group][0]))
+        self.ids[group] = new_id
+        self.cost += self.table[new_id] - self.table[old_id]
+        self.pegs[disk] = to_peg
+        bit = 1 << disk
+        self.masks[from_peg] ^= bit
+        self.masks[to_peg] |= bit
+
+    def search(self, depth, bound, last_disk):
+        # В таблице переходов хранится уточнённая нижняя оценка остатка пути
+        # для пары (позиция, последний диск): когда все ходы из позиции
+        # превысили порог, остаток не меньше наименьшего превышения.
+        key = (self.state_key(), last_disk)
+        remaining = max(self.cost, self.bounds.get(key, 0))
+        if depth + remaining > bound:
+            return depth + remaining
+        if not self.cost:
+            return True
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SearchLimitExceeded(self.nodes)
+        masks = self.masks
+        best = float('inf')
+        for from_peg in range(NUM_PEGS):
+            source = masks[from_peg]
+            if not source:
+                continue
+            top = source & -source
+            disk = top.bit_length() - 1
+            if disk == last_disk:
+                continue
+            for to_peg in range(NUM_PEGS):
+                if to_peg == from_peg:
+                    continue
+                destination = masks[to_peg]
+                if destination and destination & -destination < top:
+                    continue
+                self.shift(disk, from_peg, to_peg)
+                self.path.append((from_peg, to_peg))
+                found = self.search(depth + 1, bound, disk)
+                if found is True:
+                    return True
+                self.path.pop()
+                self.shift(disk, to_peg, from_peg)
+                best = min(best, found)
+        self.bounds[key] = best - depth
+        return best
+
+
+class PatternHintTracker(HintTracker):
+    # Подсказка для четырёх стержней и цели-башни. Если поиск не уложился в
+    # лимит узлов, подсказки нет до следующего хода.
+
+    def __init__(self, engine, search=None):
+        if engine.num_pegs != NUM_PEGS:
+            raise ValueError(f"Подсказка по базам образцов работает только для {NUM_PEGS} стержней")
+        if search is None and engine.num_disks > MAX_HINT_DISKS:
+            raise ValueError(f"Подсказка для четырёх стержней доступна до {MAX_HINT_DISKS} дисков")
+        if len(set(engine.target_positions)) != 1:
+            raise ValueError("Цель должна быть башней на одном стержне")
+        self.search = search or PatternSearch(engine.num_disks)
+        super().__init__(engine)
+
+    def plan_moves(self):
+        try:
+            path = self.search.solve(self.engine.positions(), self.engine.target_positions[0])
+        except SearchLimitExceeded:
+            path = []
+        return iter(path)
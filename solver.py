@@ -0,0 +1,206 @@
+from functools import lru_cache
+from itertools import permutations
+
+# Ход номер m (с единицы) оптимального решения для трёх стержней
+# перекладывает диск с младшим установленным битом m со стержня
+# (m & (m - 1)) % 3 на стержень ((m | (m - 1)) + 1) % 3. В этой нумерации
+# башня уходит со стержня 0 на стержень 2 при нечётном числе дисков и на
+# стержень 1 при чётном, поэтому стержни переименовываются под source и
+# target.
+#
+# Если записать m = j * 2^k + r, то для r != 0 ходы совпадают с ходами
+# решения для k дисков, сдвинутыми по кругу на (j * 2^k) % 3. Генератор
+# один раз строит блок из 2^k - 1 ходов в трёх сдвигах и отдаёт его через
+# yield from, а формулой считает только ходы больших дисков между блоками.
+
+BLOCK_DISKS = 12
+
+
+def solution_length(num_disks):
+    return (1 << num_disks) - 1
+
+
+def peg_labels(num_disks, source=0, target=2):
+    return labels_for_parity(num_disks % 2, source, target)
+
+
+@lru_cache(maxsize=None)
+def labels_for_parity(parity, source, target):
+    natural_target = 2 if parity else 1
+    for labels in permutations(range(3)):
+        if labels[0] == source and labels[natural_target] == target:
+            return labels
+    raise ValueError(f"Неверная пара стержней: {source} -> {target}")
+
+
+@lru_cache(maxsize=None)
+def build_blocks(block_disks, labels):
+    base = [
+        ((m & (m - 1)) % 3, ((m | (m - 1)) + 1) % 3)
+        for m in range(1, 1 << block_disks)
+    ]
+    return [
+        tuple((labels[(from_peg + shift) % 3], labels[(to_peg + shift) % 3]) for from_peg, to_peg in base)
+        for shift in range(3)
+    ]
+
+
+def solution_moves(num_disks, source=0, target=2):
+    if num_disks <= 0 or source == target:
+        return
+    labels = peg_labels(num_disks, source, target)
+    block_disks = min(num_disks, BLOCK_DISKS)
+    blocks = build_blocks(block_disks, labels)
+    block_size = 1 << block_disks
+    shift_step = block_size % 3
+    shift = 0
+    step = 0
+    for _ in range((1 << (num_disks - block_disks)) - 1):
+        yield from blocks[shift]
+        step += block_size
+        yield labels[(step & (step - 1)) % 3], labels[((step | (step - 1)) + 1) % 3]
+        shift = (shift + shift_step) % 3
+    yield from blocks[shift]
+
+
+def kth_move(num_disks, step, source=0, target=2):
+    # Ход номер step (с единицы): диск, стержень-источник, стержень-цель.
+    if not 1 <= step <= solution_length(num_disks):
+        raise ValueError(f"Шаг {step} вне решения для {num_disks} дисков")
+    labels = peg_labels(num_disks, source, target)
+    disk = (step & -step).bit_length()
+    return disk, labels[(step & (step - 1)) % 3], labels[((step | (step - 1)) + 1) % 3]
+
+
+def positions_after(num_disks, step, source=0, target=2):
+    # Позиция после step оптимальных ходов по двоичным цифрам step:
+    # старший диск уже переложен, если его бит равен единице; дальше
+    # задача сводится к башне из меньших дисков с переставленными стержнями.
+    if not 0 <= step <= solution_length(num_disks):
+        raise ValueError(f"Шаг {step} вне решения для {num_disks} дисков")
+    positions = [0] * num_disks
+    spare = 3 - source - target
+    for disk in range(num_disks - 1, -1, -1):
+        if step >> disk & 1:
+            positions[disk] = target
+            source, spare = spare, source
+        else:
+            positions[disk] = source
+            target, spare = spare, target
+    return positions
+
+
+# Кратчайший путь между произвольными позициями. Пусть d - наибольший
+# диск, стоящий не на своём месте, s и t - его стержни в начальной и
+# целевой позициях, r - третий стержень. Оптимальный путь перекладывает
+# d либо один раз (меньшие диски собираются на r), либо дважды через r
+# (меньшие диски собираются на t, затем башней уходят на s).
+
+
+def gather_targets(positions, count, peg):
+    # targets[j] - стержень, на котором должен оказаться диск j, когда все
+    # диски до j включительно собираются в башню на peg.
+    targets = [peg] * count
+    for disk in range(count - 1, 0, -1):
+        peg = targets[disk]
+        if positions[disk] != peg:
+            peg = 3 - positions[disk] - peg
+        targets[disk - 1] = peg
+    return targets
+
+
+def gather_distance(positions, count, peg):
+    moves = 0
+    for disk in range(count - 1, -1, -1):
+        if positions[disk] != peg:
+            moves += 1 << disk
+            peg = 3 - positions[disk] - peg
+    return moves
+
+
+def gather_moves(positions, count, peg):
+    targets = gather_targets(positions, count, peg)
+    for disk in range(count):
+        if positions[disk] != targets[disk]:
+            yield positions[disk], targets[disk]
+            if disk:
+                yield from solution_moves(disk, targets[disk - 1], targets[disk])
+
+
+def scatter_moves(positions, count, peg):
+    # Обратный путь к gather_moves: из башни на peg в позицию positions.
+    targets = gather_targets(positions, count, peg)
+    for disk in range(count - 1, -1, -1):
+        if positions[disk] != targets[disk]:
+            if disk:
+                yield from solution_moves(disk, targets[disk], targets[disk - 1])
+            yield targets[disk], positions[disk]
+
+
+def plan_route(start, target):
+    disk = len(start) - 1
+    while disk >= 0 and start[disk] == target[disk]:
+        disk -= 1
+    if disk < 0:
+        return None, 0
+    source_peg = start[disk]
+    target_peg = target[disk]
+    spare = 3 - source_peg - target_peg
+    direct = gather_distance(start, disk, spare) + 1 + gather_distance(target, disk, spare)
+    detour = gather_distance(start, disk, target_peg) + (1 << disk) + 1 + gather_distance(target, disk, source_peg)
+    if direct <= detour:
+        return (disk, False), direct
+    return (disk, True), detour
+
+
+def distance(start, target):
+    if len(start) != len(target):
+        raise ValueError("Позиции должны описывать одинаковое число дисков")
+    return plan_route(start, target)[1]
+
+
+def path_moves(start, target):
+    if len(start) != len(target):
+        raise ValueError("Позиции должны описывать одинаковое число дисков")
+    route, _ = plan_route(start, target)
+    if route is None:
+        return
+    disk, twice = route
+    source_peg = start[disk]
+    target_peg = target[disk]
+    spare = 3 - source_peg - target_peg
+    if not twice:
+        yield from gather_moves(start, disk, spare)
+        yield source_peg, target_peg
+        yield from scatter_moves(target, disk, spare)
+    else:
+        yield from gather_moves(start, disk, target_peg)
+        yield source_peg, spare
+        yield from solution_moves(disk, target_peg, source_peg)
+        yield spare, target_peg
+        yield from scatter_moves(target, disk, source_peg)
+
+
+class HintTracker:
+    # Следующий оптимальный ход из текущей позиции движка. Пока игрок
+    # делает подсказанные ходы, план просто продвигается по генератору;
+    # любой другой ход (или отмена) перестраивает план за O(N).
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reset()
+
+    def reset(self):
+        self.plan = self.plan_moves()
+        self.next_move = next(self.plan, None)
+        self.move_count = self.engine.move_count
+
+    def plan_moves(self):
+        return path_moves(self.engine.positions(), self.engine.target_positions)
+
+    def observe(self, from_peg, to_peg, move_count):
+        if move_count == self.move_count + 1 and (from_peg, to_peg) == self.next_move:
+            self.next_move = next(self.plan, None)
+            self.move_count = move_count
+        else:
+            self.reset()
@@ -0,0 +1,82 @@
+from solver import solution_moves
+
+# Взаимозаменяемые генераторы оптимального решения для трёх стержней.
+# Каждый принимает (num_disks, source, target) и отдаёт ходы (from, to)
+# в одном и том же порядке; выбирать можно по имени через get_solver().
+
+
+def recursive_moves(num_disks, source=0, target=2):
+    if num_disks <= 0 or source == target:
+        return
+    spare = 3 - source - target
+    yield from recursive_moves(num_disks - 1, source, spare)
+    yield source, target
+    yield from recursive_moves(num_disks - 1, spare, target)
+
+
+def stack_moves(num_disks, source=0, target=2):
+    if source == target:
+        return
+    tasks = [(num_disks, source, target)]
+    while tasks:
+        disks, from_peg, to_peg = tasks.pop()
+        if not disks:
+            continue
+        spare = 3 - from_peg - to_peg
+        if disks == 1:
+            yield from_peg, to_peg
+            continue
+        tasks.append((disks - 1, spare, to_peg))
+        tasks.append((1, from_peg, to_peg))
+        tasks.append((disks - 1, from_peg, spare))
+
+
+def gray_code_moves(num_disks, source=0, target=2):
+    # Бит, меняющийся в коде Грея на шаге m, - номер диска. Самый маленький
+    # диск ходит по кругу (направление зависит от чётности N), остальные
+    # ходы - единственный допустимый ход между двумя другими стержнями.
+    if num_disks <= 0 or source == target:
+        return
+    labels = (source, 3 - source - target, target)
+    masks = [(1 << num_disks) - 1, 0, 0]
+    step = 1 if num_disks % 2 == 0 else 2
+    smallest = 0
+    for m in range(1, 1 << num_disks):
+        if m & 1:
+            to_peg = (smallest + step) % 3
+            masks[smallest] ^= 1
+            masks[to_peg] |= 1
+            yield labels[smallest], labels[to_peg]
+            smallest = to_peg
+            continue
+        first = (smallest + 1) % 3
+        second = (smallest + 2) % 3
+        first_top = masks[first] & -masks[first]
+        second_top = masks[second] & -masks[second]
+        if not second_top or (first_top and first_top < second_top):
+            from_peg, to_peg, top = first, second, first_top
+        else:
+            from_peg, to_peg, top = second, first, second_top
+        masks[from_peg] ^= top
+        masks[to_peg] |= top
+        yield labels[from_peg], labels[to_peg]
+
+
+SOLVERS = {
+    'recursive': recursive_moves,
+    'stack': stack_moves,
+    'gray': gray_code_moves,
+    'bitwise': solution_moves,
+}
+DEFAULT_SOLVER = 'bitwise'
+
+
+def get_solver(name=DEFAULT_SOLVER):
+    try:
+        return SOLVERS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный решатель: {name}") from None
+
+
+def register_solver(name, moves):
+    SOLVERS[name] = moves
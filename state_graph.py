@@ -0,0 +1,131 @@
+from collections import namedtuple
+
+import numpy as np
+
+from encoding import decode_states, encode_state
+
+# Таблица расстояний до цели для всех 3^N позиций. Позиции нумеруются
+# base-3 ID из encoding.py, расстояние хранится в uint16 (диаметр графа
+# для N <= 16 не больше 2^16 - 1). Из любой позиции есть не больше трёх
+# ходов: самый маленький диск на любой из двух других стержней и
+# единственный ход между оставшимися двумя стержнями. Таблица соседей
+# строится векторно один раз, после чего каждый слой BFS - это несколько
+# операций NumPy над всем фронтом. Посещённые позиции отмечаются в
+# отдельной маске: при N = 16 расстояние 2^16 - 1 занимает весь диапазон
+# uint16, и свободного значения-метки не остаётся.
+
+MAX_TABLE_DISKS = 16
+CHUNK_STATES = 1 << 16
+
+GraphStats = namedtuple('GraphStats', ['eccentricity', 'distance_histogram', 'average'])
+EccentricityStats = namedtuple('EccentricityStats', ['radius', 'diameter', 'histogram'])
+
+
+def neighbour_table(num_disks):
+    num_states = 3 ** num_disks
+    neighbours = np.empty((num_states, 3), dtype=np.int32)
+    for start in range(0, num_states, CHUNK_STATES):
+        stop = min(start + CHUNK_STATES, num_states)
+        neighbours[start:stop] = chunk_neighbours(start, stop, num_disks)
+    return neighbours
+
+
+def chunk_neighbours(start, stop, num_disks):
+    state_ids = np.arange(start, stop, dtype=np.int64)
+    positions = decode_states(state_ids, num_disks)
+    powers = np.append(3 ** np.arange(num_disks, dtype=np.int64), 0)
+    tops = np.empty((len(state_ids), 3), dtype=np.int64)
+    for peg in range(3):
+        on_peg = positions == peg
+        tops[:, peg] = np.where(on_peg.any(axis=1), on_peg.argmax(axis=1), num_disks)
+    smallest = positions[:, 0].astype(np.int64)
+    first = (smallest + 1) % 3
+    second = (smallest + 2) % 3
+    first_top = np.take_along_axis(tops, first[:, np.newaxis], axis=1)[:, 0]
+    second_top = np.take_along_axis(tops, second[:, np.newaxis], axis=1)[:, 0]
+    step = np.where(
+        first_top < second_top,
+        (second - first) * powers[first_top],
+        (first - second) * powers[second_top],
+    )
+    neighbours = np.empty((len(state_ids), 3), dtype=np.int32)
+    neighbours[:, 0] = state_ids + first - smallest
+    neighbours[:, 1] = state_ids + second - smallest
+    # В совершенной позиции третьего хода нет; вместо петли повторяется
+    # первый сосед.
+    neighbours[:, 2] = np.where(first_top == second_top, neighbours[:, 0], state_ids + step)
+    return neighbours
+
+
+class DistanceTable:
+    def __init__(self, num_disks, target=None, cache=None):
+        if num_disks > MAX_TABLE_DISKS:
+            raise ValueError(f"Таблица строится не больше чем для {MAX_TABLE_DISKS} дисков")
+        if target is None:
+            target = [2] * num_disks
+        self.num_disks = num_disks
+        self.target = list(target)
+        if cache is None:
+            self.distances = self.build()
+        else:
+            self.distances = cache.get_or_build('distances3', num_disks, self.build, encode_state(self.target))
+
+    def build(self):
+        neighbours = neighbour_table(self.num_disks)
+        distances = np.zeros(3 ** self.num_disks, dtype=np.uint16)
+        visited = np.zeros(3 ** self.num_disks, dtype=bool)
+        frontier = np.array([encode_state(self.target)], dtype=np.int64)
+        visited[frontier] = True
+        level = 0
+        while True:
+            candidates = neighbours[frontier].ravel()
+            frontier = np.unique(candidates[~visited[candidates]])
+            if not len(frontier):
+                return distances
+            level += 1
+            visited[frontier] = True
+            distances[frontier] = level
+
+    def distance(self, state_id):
+        return int(self.distances[state_id])
+
+    def distances_for(self, state_ids):
+        return self.distances[np.asarray(state_ids, dtype=np.int64)]
+
+    def stats(self):
+        histogram = np.bincount(self.distances)
+        return GraphStats(
+            eccentricity=len(histogram) - 1,
+            distance_histogram=histogram,
+            average=float(self.distances.mean()),
+        )
+
+
+def diameter(num_disks):
+    # Диаметр графа Ханойской башни достигается между совершенными
+    # позициями (все диски на одном стержне), а из-за симметрии стержней
+    # их эксцентриситеты равны, поэтому достаточно одного BFS.
+    return DistanceTable(num_disks).stats().eccentricity
+
+
+def eccentricities(num_disks, cache=None):
+    # Самая далёкая от любой позиции вершина - одна из трёх совершенных
+    # позиций, поэтому эксцентриситет каждой позиции - максимум по трём
+    # таблицам расстояний до башен на стержнях 0, 1 и 2.
+    result = None
+    for peg in range(3):
+        distances = DistanceTable(num_disks, [peg] * num_disks, cache).distances
+        if result is None:
+            result = np.array(distances)
+        else:
+            np.maximum(result, distances, out=result)
+    return result
+
+
+def eccentricity_stats(num_disks, cache=None):
+    histogram = np.bincount(eccentricities(num_disks, cache))
+    return EccentricityStats(
+        radius=int(np.flatnonzero(histogram)[0]),
+        diameter=len(histogram) - 1,
+        histogram=histogram,
+    )